@@ -1,78 +1,419 @@
-import requests
+import argparse
 import re
 import json
 import sys
+import codecs
+import hashlib
+import os
 from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
 
 URL = "https://medicine.yale.edu/lab/khoshnood/publications/reports/"
 
-def get_latest_report():
+# Remembers the last response validators and parsed result so an unchanged
+# page costs a 304 and nothing else.
+CACHE_FILE = Path(__file__).resolve().parent / ".cache" / "yale_page.json"
+
+# Where yale_watcher.py listens when it is running
+WATCHER_SOCKET = Path(__file__).resolve().parent / ".cache" / "watcher.sock"
+
+MANIFEST_FILE = Path(__file__).resolve().parent / "yale_manifest.json"
+INGEST_DIR = Path(__file__).resolve().parent / "initial_ingest"
+
+CHUNK_SIZE = 16 * 1024
+MAX_BLOCK_CHARS = 8 * 1024 # a block with no citation by now never gets one
+
+DOC_LINK_PATTERN = re.compile(r'https://files-profile\.medicine\.yale\.edu/documents/[^"\s?#]+', re.IGNORECASE)
+
+# Citation | Authors “Title” 16 January 2026. ...
+# Every quantifier is over a negated class or bounded, so a match attempt is
+# linear in the block length and cannot backtrack across the page. The
+# authors can't run past a "|" either: otherwise each of k "Citation |"
+# prefixes with no quoted title after them scans to the end of the block,
+# and the search is quadratic in k.
+CITATION_PATTERN = re.compile(
+    r'Citation\s*\|[^“"|]*[“"](?P<title>[^”"]*)[”"][^0-9]{0,40}?'
+    r'(?P<date>\d{1,2}\s+[A-Za-z]+\s+\d{4}|[A-Za-z]+\s+\d{1,2},\s+\d{4})',
+    re.IGNORECASE,
+)
+
+# Fallbacks for blocks whose citation isn't in the usual form:
+# "Title (September 20, 2024)" link labels, then any date in the block.
+LINK_DATE_PATTERN = re.compile(r'\s*\(([A-Za-z]+\s+\d{1,2},\s+\d{4})\)\s*$')
+DATE_PATTERN = re.compile(r'\d{1,2}\s+[A-Za-z]+\s+\d{4}|[A-Za-z]+\s+\d{1,2},\s+\d{4}')
+
+DATE_FORMATS = ("%d %B %Y", "%B %d, %Y")
+
+def to_iso_date(date_str):
+    date_str = " ".join(date_str.split())
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return date_str
+
+class ReportBlockParser(HTMLParser):
+    """
+    Incremental parser that turns the reports page into report blocks. A block
+    starts at a document link and ends once its citation (title and date) has
+    been read, or when the next document link starts. Completed blocks are
+    queued in `blocks` as they are found, so callers can stop feeding early.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self._url = None
+        self._last_url = None
+        self._in_link = False
+        self._link_text = []
+        self._text = []
+        self._text_len = 0
+        self._after_data = False
+
+    def handle_starttag(self, tag, attrs):
+        self._after_data = False
+        if tag != 'a':
+            return
+        match = DOC_LINK_PATTERN.match(dict(attrs).get('href') or '')
+        if not match:
+            return
+        url = match.group(0)
+        if url in (self._url, self._last_url):
+            # Title link, "Copy Link" and download buttons share one URL
+            self._in_link = url == self._url
+            return
+        self._finish()
+        self._url = url
+        self._in_link = True
+
+    def handle_endtag(self, tag):
+        self._after_data = False
+        if tag == 'a':
+            self._in_link = False
+
+    def handle_data(self, data):
+        if self._url is None:
+            return
+        if self._after_data:
+            # The rest of a text run that a chunk boundary split. Joined with
+            # a space, "Oct" + "ober 6, 2025" would date the report "ober 6, 2025"
+            if self._in_link:
+                self._link_text[-1] += data
+            self._text[-1] += data
+        else:
+            if self._in_link:
+                self._link_text.append(data)
+            self._text.append(data)
+        self._after_data = True
+        self._text_len += len(data)
+        if self._text_len > MAX_BLOCK_CHARS:
+            self._finish()
+        elif any(c.isdigit() for c in data):
+            block_text = " ".join(" ".join(self._text).split())
+            match = CITATION_PATTERN.search(block_text)
+            if match:
+                self._finish(match)
+
+    def close(self):
+        super().close()
+        self._finish()
+
+    def _finish(self, citation=None):
+        if self._url is None:
+            return
+        block_text = " ".join(" ".join(self._text).split())
+        link_text = " ".join(" ".join(self._link_text).split())
+        if citation is None:
+            citation = CITATION_PATTERN.search(block_text)
+        if citation:
+            title, date_str = citation.group("title").strip(), citation.group("date")
+        else:
+            link_date = LINK_DATE_PATTERN.search(link_text)
+            any_date = DATE_PATTERN.search(block_text)
+            title = link_text[:link_date.start()] if link_date else link_text
+            date_str = link_date.group(1) if link_date else any_date.group(0) if any_date else ""
+        self.blocks.append({
+            "url": self._url,
+            "title": title,
+            "date": to_iso_date(date_str) if date_str else "",
+            "text": block_text,
+        })
+        self._last_url = self._url
+        self._url = None
+        self._in_link = False
+        self._link_text = []
+        self._text = []
+        self._text_len = 0
+        self._after_data = False
+
+def iter_report_blocks(response):
+    """
+    Streams the response body in chunks and yields report blocks as soon as
+    each one is complete. Stopping iteration stops the download.
+    """
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    parser = ReportBlockParser()
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        parser.feed(decoder.decode(chunk))
+        while parser.blocks:
+            yield parser.blocks.pop(0)
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    yield from parser.blocks
+
+def block_hash(block):
+    return hashlib.sha256(f"{block['url']}\n{block['text']}".encode('utf-8')).hexdigest()
+
+def load_cache():
     try:
-        response = requests.get(URL, timeout=10)
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_cache(cache):
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CACHE_FILE.with_suffix(".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp, CACHE_FILE)
+
+def conditional_headers(cache):
+    headers = {}
+    if cache.get("result"):
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache.get("last_modified"):
+            headers["If-Modified-Since"] = cache["last_modified"]
+    return headers
+
+def load_metrics():
+    # The shared metrics module lives with the ingest scripts
+    if str(INGEST_DIR) not in sys.path:
+        sys.path.insert(0, str(INGEST_DIR))
+    import metrics
+
+    return metrics
+
+def fetch_page(headers):
+    """
+    Starts a streaming GET of the reports page. Returns None on 304.
+    """
+    # Imported here: requests is most of the start-up time, and a watcher
+    # answer or a --help never needs it
+    import requests
+
+    metrics = load_metrics()
+    try:
+        with metrics.phase("fetch"):
+            response = requests.get(URL, headers=headers, timeout=10, stream=True,
+                                    hooks={"response": metrics.response_hook})
+        if response.status_code == 304:
+            response.close()
+            return None
         response.raise_for_status()
-        html_content = response.text
+        return response
     except Exception as e:
         print(json.dumps({"error": f"Failed to fetch page: {str(e)}"}))
         sys.exit(1)
 
-    # Split by "Citation |" to find report blocks
-    # This assumes the most recent report is at the top of the list/first found
-    # The structure seems to be: Title ... Citation | Authors ... "Title" Date. ...
-    
-    # We will look for the "Citation |" markers. The text *before* the citation often contains the title, 
-    # but the Citation itself contains the title in quotes and the date.
-    
-    # Regex to find the first "Citation |" block and extract details
-    # We look for the pattern: Citation | [Authors] "[Title]" [Date].
-    
-    # Let's try to capture the first occurrence.
-    # It usually looks like: Citation | ... “Title” ... Date.
-    
-    pattern = re.compile(r'Citation\s*\|\s*.*?[“"](.*?)[”"].*?(\d{1,2}\s+[A-Z][a-z]+\s+\d{4})', re.DOTALL | re.IGNORECASE)
-    
-    matches = pattern.findall(html_content)
-    
-    if not matches:
-        # Fallback/Debug: try to just find the first link to a document as a proxy if citation parsing fails
-        print(json.dumps({"error": "Could not parse reports from page structure."}))
+def to_result(block):
+    return {
+        "title": block["title"],
+        "date": block["date"],
+        "url": block["url"]
+    }
+
+def update_cache(headers, latest, cache=None):
+    """
+    Saves the validators and latest report, unless `cache` (the one already
+    on disk, if the caller has it) holds exactly that.
+    """
+    updated = {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "section_hash": block_hash(latest),
+        "result": to_result(latest),
+    }
+    if updated != cache:
+        save_cache(updated)
+
+def latest_error(latest):
+    """
+    Returns the error to report for the page's first block, or None if it
+    can be used.
+    """
+    if latest is None:
+        return "Could not find any document links."
+    if not latest["date"]:
+        return "Could not parse reports from page structure."
+    return None
+
+def load_manifest():
+    with open(MANIFEST_FILE, encoding='utf-8') as f:
+        return json.load(f)
+
+def load_known_urls(path):
+    with open(path, encoding='utf-8') as f:
+        return {line.strip() for line in f if line.strip()}
+
+def load_cataloged_urls():
+    # Only needed for --uncataloged, so the default check doesn't pay for the import
+    if str(INGEST_DIR) not in sys.path:
+        sys.path.insert(0, str(INGEST_DIR))
+    from catalog import ARCHIVED, SKIPPED, load_catalog
+
+    return set(load_catalog().urls_with_status(ARCHIVED, SKIPPED))
+
+def get_latest_report():
+    cache = load_cache()
+    response = fetch_page(conditional_headers(cache))
+    if response is None:
+        print(json.dumps({**cache["result"], "changed": False}, indent=2))
+        return
+
+    # The most recent report is the first block on the page; stop reading there.
+    try:
+        with response, load_metrics().phase("parse"):
+            latest = next(iter_report_blocks(response), None)
+    except Exception as e:
+        print(json.dumps({"error": f"Failed to fetch page: {str(e)}"}))
+        sys.exit(1)
+
+    error = latest_error(latest)
+    if error:
+        print(json.dumps({"error": error}))
         sys.exit(0)
 
-    # Get the first match (most recent)
-    title, date_str = matches[0]
-    
-    # Clean up title
-    title = title.strip()
-    
-    # Parse Date
+    update_cache(response.headers, latest, cache)
+    changed = block_hash(latest) != cache.get("section_hash")
+    print(json.dumps({**to_result(latest), "changed": changed}, indent=2))
+
+def select_new_reports(blocks, since_url=None, known_urls=None):
+    """
+    Walks `blocks` (newest first) up to `since_url`, skipping `known_urls`.
+    Returns (reports oldest first, anchor_found, latest block). Stops
+    consuming `blocks` at the anchor, so a streamed page stops downloading.
+    """
+    new_reports = []
+    anchor_found = False
+    latest = None
+    for block in blocks:
+        latest = latest or block
+        if since_url and block["url"] == since_url:
+            anchor_found = True
+            break
+        if known_urls is not None and block["url"] in known_urls:
+            continue
+        new_reports.append(to_result(block))
+    return new_reports[::-1], anchor_found, latest
+
+def ask_watcher(request, timeout=2):
+    """
+    Sends one JSON request to a running yale_watcher.py and returns its
+    answer, or None if no watcher is listening.
+    """
+    if not WATCHER_SOCKET.exists():
+        return None
+    import socket
+
     try:
-        # Expected formats: "16 January 2026", "21 November 2025"
-        date_obj = datetime.strptime(date_str.strip(), "%d %B %Y")
-        iso_date = date_obj.strftime("%Y-%m-%d")
-    except ValueError:
-        iso_date = date_str.strip()
-
-    # Find the URL. We assume the "Copy Link" or the report title links to the PDF.
-    # We'll look for the first 'href' that contains 'documents' or 'pdf' appearing *near* the start of the report list.
-    # A simple reliable way for this specific page (based on previous observations) is that 
-    # the "Copy Link" or title href is usually the one we want.
-    
-    # Let's find all links and pick the first one that looks like a document
-    link_pattern = re.compile(r'href=["\"](https://files-profile\.medicine\.yale\.edu/documents/[^"\\]+)["\"]', re.IGNORECASE)
-    link_matches = link_pattern.findall(html_content)
-    
-    if not link_matches:
-         print(json.dumps({"error": "Could not find any document links."}))
-         sys.exit(0)
-         
-    latest_url = link_matches[0]
-
-    result = {
-        "title": title,
-        "date": iso_date,
-        "url": latest_url
-    }
-    
-    print(json.dumps(result, indent=2))
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(WATCHER_SOCKET))
+            sock.sendall(json.dumps(request).encode('utf-8') + b"\n")
+            with sock.makefile('rb') as f:
+                line = f.readline()
+    except (OSError, AttributeError):
+        return None
+    try:
+        answer = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return None if "error" in answer else answer
+
+def get_new_reports(since_url=None, known_urls=None):
+    """
+    Lists every report newer than `since_url` (everything above it on the
+    page), or every report not in `known_urls`, in one fetch and one parse.
+    With `since_url` reading stops at that report. Reports are printed oldest
+    first so they can be ingested in order.
+    """
+    cache = load_cache()
+    # A 304 only proves nothing is new if the cached latest report is the anchor
+    cached_url = cache.get("result", {}).get("url")
+    headers = conditional_headers(cache) if since_url and cached_url == since_url else {}
+
+    response = fetch_page(headers)
+    if response is None:
+        print(json.dumps({"since_url": since_url, "anchor_found": True, "changed": False, "reports": []}, indent=2))
+        return
+
+    try:
+        with response, load_metrics().phase("parse"):
+            new_reports, anchor_found, latest = select_new_reports(iter_report_blocks(response), since_url, known_urls)
+    except Exception as e:
+        print(json.dumps({"error": f"Failed to fetch page: {str(e)}"}))
+        sys.exit(1)
+
+    changed = latest is not None and block_hash(latest) != cache.get("section_hash")
+    if latest is not None:
+        update_cache(response.headers, latest, cache)
+
+    output = {"changed": changed, "reports": new_reports}
+    if since_url:
+        # If the anchor is missing the list is the whole page: check each one against the archive
+        output = {"since_url": since_url, "anchor_found": anchor_found, **output}
+    print(json.dumps(output, indent=2))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Find the latest Yale HRL report(s).")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--new", action="store_true",
+        help="List every report newer than last_ingested_url in yale_manifest.json, oldest first.",
+    )
+    mode.add_argument(
+        "--known-urls", metavar="FILE",
+        help="List every report whose URL is not in FILE (one URL per line), oldest first.",
+    )
+    mode.add_argument(
+        "--uncataloged", action="store_true",
+        help="List every report yale_catalog.json does not mark as archived or skipped, oldest first.",
+    )
+    parser.add_argument(
+        "--no-watcher", action="store_true",
+        help="Fetch the page even if yale_watcher.py is running.",
+    )
+    return parser.parse_args()
+
+def watcher_request(args):
+    if args.new:
+        return {"cmd": "new", "since_url": load_manifest().get("last_ingested_url")}
+    if args.known_urls:
+        return {"cmd": "new", "known_urls": sorted(load_known_urls(args.known_urls))}
+    if args.uncataloged:
+        return {"cmd": "uncataloged"}
+    return {"cmd": "latest"}
+
+def main(args):
+    answer = None if args.no_watcher else ask_watcher(watcher_request(args))
+    if answer is not None:
+        print(json.dumps(answer, indent=2))
+        return
+    # Metrics only for runs that fetch the page themselves
+    with load_metrics().run("get_latest_yale_reports"):
+        if args.new:
+            get_new_reports(since_url=load_manifest().get("last_ingested_url"))
+        elif args.known_urls:
+            get_new_reports(known_urls=load_known_urls(args.known_urls))
+        elif args.uncataloged:
+            get_new_reports(known_urls=load_cataloged_urls())
+        else:
+            get_latest_report()
 
 if __name__ == "__main__":
-    get_latest_report()
+    main(parse_args())
@@ -0,0 +1,113 @@
+import json
+import time
+from pathlib import Path
+
+from file_lock import write_json
+from sda_client import get_client
+from subjects import resolve_subject_id
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache"
+INDEX_FILE = CACHE_DIR / "archive_index.json"
+PER_PAGE = 100
+DEFAULT_MAX_AGE = 15 * 60 # seconds
+
+def iter_accessions(per_page=PER_PAGE, **filters):
+    """
+    Pages through every accession matching the list filters (e.g.
+    metadata_subjects, url_filter), yielding the raw accession dicts.
+    """
+    client = get_client()
+    page = 0
+    while True:
+        data = client.list_accessions(page=page, per_page=per_page, **filters)
+
+        items = data.get('items', []) if isinstance(data, dict) else data
+        yield from items
+
+        page += 1
+        num_pages = data.get('num_pages') if isinstance(data, dict) else None
+        if not items:
+            break
+        if num_pages is not None and page >= num_pages:
+            break
+        if num_pages is None and len(items) < per_page:
+            break
+
+def fetch_accessions(subject_id=None, per_page=PER_PAGE):
+    """
+    Yields every accession tagged with `subject_id` (default: the Yale lab).
+    One request per page instead of one per URL.
+    """
+    subject_id = subject_id or resolve_subject_id()
+    return iter_accessions(per_page, metadata_subjects=subject_id)
+
+class ArchiveIndex:
+    """
+    In-memory map of seed_url -> accession for one subject, persisted to disk
+    with the time it was fetched so repeated runs can skip the API entirely.
+    """
+
+    def __init__(self, accessions=None, fetched_at=0.0, subject_id=None):
+        self.accessions = accessions or {}
+        self.fetched_at = fetched_at
+        self.subject_id = subject_id
+
+    def __contains__(self, url):
+        return url in self.accessions
+
+    def __len__(self):
+        return len(self.accessions)
+
+    def get(self, url):
+        return self.accessions.get(url)
+
+    def add(self, accession):
+        url = accession.get('seed_url')
+        if url:
+            self.accessions[url] = accession
+
+    def age(self):
+        return time.time() - self.fetched_at
+
+    def save(self, path=INDEX_FILE):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_json(path, {
+            "subject_id": self.subject_id,
+            "fetched_at": self.fetched_at,
+            "accessions": self.accessions,
+        }, sort_keys=False)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('accessions', {}), data.get('fetched_at', 0.0), data.get('subject_id'))
+
+    @classmethod
+    def fetch(cls, subject_id=None):
+        subject_id = subject_id or resolve_subject_id()
+        index = cls(subject_id=subject_id, fetched_at=time.time())
+        for accession in fetch_accessions(subject_id):
+            index.add(accession)
+        return index
+
+def load_archive_index(max_age=DEFAULT_MAX_AGE, refresh=False, subject_id=None, path=INDEX_FILE):
+    """
+    Returns the archive index, reusing the on-disk copy if it is younger than
+    `max_age` seconds and otherwise re-fetching and saving it.
+    """
+    subject_id = subject_id or resolve_subject_id()
+    if not refresh:
+        try:
+            index = ArchiveIndex.load(path)
+            if index.subject_id == subject_id and index.age() < max_age:
+                return index
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    print(f"Building archive index for subject {subject_id}...")
+    index = ArchiveIndex.fetch(subject_id)
+    index.save(path)
+    print(f"Indexed {len(index)} archived URLs.")
+    return index
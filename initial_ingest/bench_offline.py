@@ -0,0 +1,178 @@
+import argparse
+import contextlib
+import io
+import os
+import re
+import tempfile
+import time
+
+import archive_index
+import polars as pl
+import check_existing_reports
+import crawl_timing
+import ingest_reports
+import report_table
+import scrape_reports
+import update_existing_subjects
+from catalog import Catalog
+from fake_sda_api import FIXTURE_PAGE, REPORTS_PATH, FakeSdaApi
+from report_dates import ISO_FORMAT, parse_dates
+from sda_client import SdaClient, set_client
+from state_store import StateStore
+from subjects import SubjectResolver, set_resolver
+
+# Runs the real scraping, existence-check, ingestion and subject-update code
+# against fake_sda_api.py and reports wall time and throughput per phase.
+
+SUBJECT_ID = 37
+UUID_PATTERN = re.compile(r"documents/([0-9a-f]{8})(-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})")
+
+def scaled_fixture(scale, pages=1):
+    """
+    The fixture page with its report list repeated `scale` times, each copy
+    with distinct document ids, split into `pages` listing pages that link to
+    each other with ?page=N pager links. Returns the pages' HTML in order.
+    """
+    html = FIXTURE_PAGE.read_text(encoding='utf-8')
+    if scale == 1 and pages == 1:
+        return [html]
+    start = html.index("<main>") + len("<main>")
+    end = html.index("</main>")
+    body = html[start:end]
+    copies = [UUID_PATTERN.sub(lambda m: f"documents/{copy:08x}{m.group(2)}", body) for copy in range(scale)]
+    pager = '<nav class="pager">' + "".join(f'<a href="?page={n}">{n + 1}</a>' for n in range(1, pages)) + '</nav>'
+    return [
+        html[:start] + "".join(copies[n::pages]) + (pager if pages > 1 else "") + html[end:]
+        for n in range(pages)
+    ]
+
+def point_scripts_at(fake):
+    set_client(SdaClient(base_url=fake.api_url, api_key="offline-benchmark", backoff_base=0.05))
+    # Keep the fake's subject ids out of the real cache in .cache/
+    set_resolver(SubjectResolver(path="subjects.json"))
+    scrape_reports.URL = fake.reports_url
+    ingest_reports.API_KEY = update_existing_subjects.API_KEY = "offline-benchmark"
+
+class Phase:
+    def __init__(self, fake, name):
+        self.fake = fake
+        self.name = name
+
+    def __enter__(self):
+        self.requests = self.fake.requests
+        self.start = time.perf_counter()
+        self.items = 0
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        self.requests = self.fake.requests - self.requests
+
+    def row(self):
+        rate = self.items / self.elapsed if self.elapsed else float("inf")
+        return f"{self.name:<22} {self.items:>7} {self.elapsed:>9.3f} {rate:>10.1f} {self.requests:>9}"
+
+def run(args):
+    fake = FakeSdaApi(args.latency, args.crawl_delay, args.error_rate, args.throttle_rate, page_file=None, seed=1)
+    listing = scaled_fixture(args.scale, args.pages)
+    fake.page = listing[0].encode('utf-8')
+    for n, page in enumerate(listing[1:], start=1):
+        fake.add_page(f"{REPORTS_PATH}?page={n}", page)
+    fake.add_subject("Yale Humanitarian Research Lab", subject_id=SUBJECT_ID)
+    phases = []
+    quiet = contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext()
+
+    with fake, quiet:
+        point_scripts_at(fake)
+        crawl_timing.POLL_INTERVAL = args.poll_interval
+
+        with Phase(fake, "scrape") as phase:
+            scrape_reports.scrape_yale_reports()
+            df = pl.read_csv(scrape_reports.OUTPUT_FILE, infer_schema=False)
+            rows = df.with_columns(iso_format_date=parse_dates().dt.strftime(ISO_FORMAT)).to_dicts()
+            phase.items = len(rows)
+        phases.append(phase)
+
+        report_table.merge_reports(report_table.from_csv_frame(df), report_table.REPORTS_FILE)
+        with Phase(fake, "select pending") as phase:
+            phase.items = report_table.pending_reports().height
+        phases.append(phase)
+
+        # Half the catalog is already archived; a tenth of that is missing our subject
+        archived = rows[::2]
+        for i, row in enumerate(archived):
+            subjects = [] if i % 10 == 0 else [SUBJECT_ID]
+            fake.add_accession(row['url'], title=row['title'], date=row['iso_format_date'], subjects=subjects)
+        urls = [row['url'] for row in rows]
+
+        with Phase(fake, "exists (per-url)") as phase:
+            results = list(check_existing_reports.check_urls(urls, workers=args.workers, rate=args.rate))
+            phase.items = len(results)
+        phases.append(phase)
+
+        with Phase(fake, "exists (bulk index)") as phase:
+            index = archive_index.ArchiveIndex.fetch()
+            phase.items = sum(1 for url in urls if url in index)
+        phases.append(phase)
+
+        with Phase(fake, "subject updates") as phase:
+            for url in urls:
+                accession = update_existing_subjects.get_accession_by_url(url, index)
+                if accession and SUBJECT_ID not in (accession.get('subjects_en_ids') or []):
+                    update_existing_subjects.update_subjects_for_existing(accession)
+                    phase.items += 1
+        phases.append(phase)
+
+        # Same drift again, fixed by one listing and only the PUTs needed
+        with fake.lock:
+            for i, accession in enumerate(fake.accessions.values()):
+                if i % 10 == 0:
+                    accession["subjects_en_ids"] = []
+        catalog = Catalog(path=os.path.join(args.workdir, "bench_catalog.json"))
+        with Phase(fake, "reconcile (bulk)") as phase:
+            phase.items, _ = update_existing_subjects.reconcile(catalog, workers=args.workers, rate=args.rate)
+        phases.append(phase)
+
+        store = StateStore(os.path.join(args.workdir, "bench_state.db"))
+        store.seed(rows)
+        index = archive_index.ArchiveIndex.fetch()
+        todo = [row for row in rows if row['url'] not in index][:args.ingest_limit]
+        with Phase(fake, "ingest (pipelined)") as phase:
+            ingest_reports.ingest_pipelined(todo, index, store, catalog, args.in_flight, dedupe=False)
+            phase.items = store.counts().get("confirmed", 0)
+        phases.append(phase)
+        store.close()
+
+    print(f"scale={args.scale} latency={args.latency}s crawl_delay={args.crawl_delay}s "
+          f"error_rate={args.error_rate} throttle_rate={args.throttle_rate}")
+    print(f"{'phase':<22} {'items':>7} {'seconds':>9} {'items/s':>10} {'requests':>9}")
+    for phase in phases:
+        print(phase.row())
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ingest scripts against a local fake of the SDA API.")
+    parser.add_argument("--scale", type=int, default=1, help="Repeat the fixture report list N times.")
+    parser.add_argument("--pages", type=int, default=1, help="Split the report list across N paginated listing pages.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every fake request.")
+    parser.add_argument("--crawl-delay", type=float, default=0.5, help="Seconds before a POSTed crawl is listed.")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=check_existing_reports.DEFAULT_WORKERS)
+    parser.add_argument("--rate", type=float, default=1000, help="Token-bucket rate for per-URL checks.")
+    parser.add_argument("--in-flight", type=int, default=10)
+    parser.add_argument("--poll-interval", type=float, default=0.1)
+    parser.add_argument("--ingest-limit", type=int, default=50, help="Maximum reports to ingest.")
+    parser.add_argument("--verbose", action="store_true", help="Show the scripts' own output.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        args.workdir = workdir
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            run(args)
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from report_parser import DEFAULT_PARSER, PARSERS, STRATEGIES, extract_reports
+
+# The fixture copy of the reports page fake_sda_api.py serves; --page takes a
+# fresher one saved with
+# curl https://medicine.yale.edu/lab/khoshnood/publications/reports/ > page_content.html
+PAGE_FILE = Path(__file__).resolve().parent / "fixtures" / "yale_reports_page.html"
+DEFAULT_SCALES = [1, 10, 100, 1000]
+
+def scale_page(html, factor, parser=DEFAULT_PARSER):
+    """
+    Builds a page with `factor` copies of every report container on the saved
+    page, which is what the listing looks like once the catalog has grown.
+    """
+    soup = BeautifulSoup(html, parser)
+    classes = [cls for strategy in STRATEGIES for cls in strategy.container_classes]
+    containers = [str(tag) for tag in soup.find_all(class_=classes)]
+    # Nested containers would otherwise be counted twice
+    outermost = [c for c in containers if not any(c != other and c in other for other in containers)]
+    return "<html><body>" + "".join(outermost) * factor + "</body></html>"
+
+def bench(html, scales, parser):
+    print(f"Parser: {parser}")
+    print(f"{'scale':>6} {'bytes':>12} {'reports':>9} {'seconds':>9} {'us/report':>10}")
+    baseline = None
+    for factor in scales:
+        page = scale_page(html, factor, parser)
+        start = time.perf_counter()
+        reports = extract_reports(page, parser)
+        elapsed = time.perf_counter() - start
+        per_report = elapsed / max(len(reports), 1) * 1e6
+        if baseline is None:
+            baseline = per_report
+        print(f"{factor:>6} {len(page):>12} {len(reports):>9} {elapsed:>9.3f} {per_report:>10.1f}  ({per_report / baseline:.2f}x of 1x cost/report)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark report extraction on scaled copies of a saved page.")
+    parser.add_argument("--page", default=PAGE_FILE, help="Saved copy of the reports page.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="Page size multipliers.")
+    parser.add_argument("--parser", choices=PARSERS, default=DEFAULT_PARSER, help="BeautifulSoup parser backend.")
+    args = parser.parse_args()
+
+    with open(args.page, encoding='utf-8') as f:
+        html = f.read()
+    bench(html, args.scales, args.parser)
+
+if __name__ == "__main__":
+    main()
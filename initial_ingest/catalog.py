@@ -0,0 +1,161 @@
+import argparse
+import json
+import re
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from file_lock import locked, write_json
+
+# Shared record of every Yale report we know about, keyed by the document UUID
+# in its files-profile URL. Lives next to yale_manifest.json so the skill and
+# the scripts in initial_ingest all read the same file.
+CATALOG_FILE = Path(__file__).resolve().parent.parent / "yale_catalog.json"
+
+DOCUMENT_ID_PATTERN = re.compile(
+    r"files-profile\.medicine\.yale\.edu/documents/([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})",
+    re.IGNORECASE,
+)
+
+# Archive status of a report
+PENDING = "pending"    # known, not yet in the archive
+ARCHIVED = "archived"  # confirmed in the archive
+SKIPPED = "skipped"    # deliberately not archived (e.g. not about Sudan)
+STATUSES = [PENDING, ARCHIVED, SKIPPED]
+
+FIELDS = ["url", "title", "date", "status", "accession_id", "content_hash", "size"]
+
+def document_id(url_or_id):
+    """
+    Returns the lower-cased document UUID from a report URL, or the argument
+    itself if it is already a bare id.
+    """
+    match = DOCUMENT_ID_PATTERN.search(url_or_id)
+    return (match.group(1) if match else url_or_id).lower()
+
+class Catalog:
+    def __init__(self, reports=None, path=CATALOG_FILE):
+        self.reports = reports or {}
+        self.path = Path(path)
+        self.changed = set() # ids upserted since the last save
+
+    def __contains__(self, url_or_id):
+        return document_id(url_or_id) in self.reports
+
+    def __len__(self):
+        return len(self.reports)
+
+    def __iter__(self):
+        return iter(self.reports.values())
+
+    def get(self, url_or_id):
+        return self.reports.get(document_id(url_or_id))
+
+    def status(self, url_or_id):
+        entry = self.get(url_or_id)
+        return entry.get("status") if entry else None
+
+    def is_archived(self, url_or_id):
+        return self.status(url_or_id) == ARCHIVED
+
+    def urls_with_status(self, *statuses):
+        return [entry["url"] for entry in self if entry.get("status") in statuses]
+
+    def with_content_hash(self, content_hash):
+        return [entry for entry in self if entry.get("content_hash") == content_hash]
+
+    def upsert(self, url, **fields):
+        """
+        Creates or updates the entry for `url`. Fields passed as None are left
+        unchanged, so callers only need to pass what they know.
+        """
+        doc_id = document_id(url)
+        entry = self.reports.setdefault(doc_id, {"url": url, "status": PENDING})
+        for key, value in fields.items():
+            if key not in FIELDS:
+                raise ValueError(f"Unknown catalog field: {key}")
+            if value is not None:
+                entry[key] = value
+        entry["updated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.changed.add(doc_id)
+        return entry
+
+    def save(self):
+        """
+        Writes the catalog atomically, under its lock. The file is re-read
+        first and only the entries this instance changed replace what is
+        there, so entries other processes saved in the meantime are kept.
+        """
+        with locked(self.path):
+            reports = load_catalog(self.path).reports
+            reports.update({doc_id: self.reports[doc_id] for doc_id in self.changed})
+            write_json(self.path, {"reports": reports})
+        self.reports = reports
+        self.changed = set()
+
+def load_catalog(path=CATALOG_FILE):
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        data = {}
+    return Catalog(data.get("reports", {}), path)
+
+def to_iso_date(value):
+    # Accepts "2026-01-16" and the notebook's "2026-01-16T00:00:00"
+    return value[:10] if value else None
+
+def import_csv(catalog, csv_file):
+    import csv
+
+    with open(csv_file, encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        if not row.get('url'):
+            continue
+        status = ARCHIVED if row.get('ingested') == 'True' else None
+        catalog.upsert(row['url'], title=row.get('title'), date=to_iso_date(row.get('iso_format_date')), status=status)
+    return len(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Read or update the Yale report catalog.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    show = subparsers.add_parser("show", help="Print the entry for a URL or document id as JSON.")
+    show.add_argument("url")
+
+    mark = subparsers.add_parser("mark", help="Create or update the entry for a URL.")
+    mark.add_argument("url")
+    mark.add_argument("--title")
+    mark.add_argument("--date", help="ISO date, e.g. 2026-01-16")
+    mark.add_argument("--status", choices=STATUSES)
+    mark.add_argument("--accession-id", type=int)
+
+    list_cmd = subparsers.add_parser("list", help="Print URLs, optionally filtered by status.")
+    list_cmd.add_argument("--status", choices=STATUSES, action="append")
+
+    import_cmd = subparsers.add_parser("import-csv", help="Add every row of a clean reports CSV.")
+    import_cmd.add_argument("csv_file")
+
+    args = parser.parse_args()
+    catalog = load_catalog()
+
+    if args.command == "show":
+        entry = catalog.get(args.url)
+        print(json.dumps(entry, indent=2, ensure_ascii=False))
+        sys.exit(0 if entry else 1)
+    elif args.command == "mark":
+        entry = catalog.upsert(args.url, title=args.title, date=args.date, status=args.status, accession_id=args.accession_id)
+        catalog.save()
+        print(json.dumps(entry, indent=2, ensure_ascii=False))
+    elif args.command == "list":
+        statuses = args.status or STATUSES
+        for url in catalog.urls_with_status(*statuses):
+            print(url)
+    elif args.command == "import-csv":
+        count = import_csv(catalog, args.csv_file)
+        catalog.save()
+        print(f"Imported {count} rows into {catalog.path.name} ({len(catalog)} reports).")
+
+if __name__ == "__main__":
+    main()
@@ -1,67 +1,122 @@
-import csv
+import argparse
 import requests
-import time
+from concurrent.futures import ThreadPoolExecutor
 
-API_BASE_URL = "https://api.sudandigitalarchive.com/sda-api/api/v1/accessions"
-CSV_FILE = "clean_yhlr_reports.csv"
+from archive_index import DEFAULT_MAX_AGE, load_archive_index
+import metrics
+import report_table
+from catalog import ARCHIVED, load_catalog
+from rate_limit import TokenBucket
+from sda_client import get_client
+
+REPORTS_FILE = report_table.REPORTS_FILE
+
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 10  # requests per second across all workers
 
 def check_url_in_archive(url):
+    """
+    Returns True/False if the archive answered, or None if it could not be
+    reached, so an outage is never reported as a missing report.
+    """
     try:
-        response = requests.get(API_BASE_URL, params={"url_filter": url})
-        response.raise_for_status()
-        data = response.json()
-        
-        # Depending on the API structure, the results might be in a list directly or under a 'items'/'results' key.
-        # OpenAPI spec usually defines this. Assuming typical list response or paginated response.
-        # If the web_fetch summary didn't specify the exact response structure, I'll print it for the first one to debug if needed,
-        # but typically "list accessions" returns a list of items.
-        # Let's assume if 'items' exists use that, otherwise assume data itself is the list.
-        
-        results = data.get('items', data) if isinstance(data, dict) else data
-        
-        return len(results) > 0
+        return get_client().url_exists(url)
     except requests.RequestException as e:
         print(f"Error checking URL {url}: {e}")
-        return False
+        return None
+
+def check_urls(urls, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE):
+    """
+    Checks many URLs concurrently. At most `workers` requests are in flight and
+    a shared token bucket caps the overall rate, so we stay nice to the API
+    without paying a fixed sleep per row. Yields (url, exists) in input order,
+    with exists None where the check failed.
+    """
+    bucket = TokenBucket(rate)
+
+    def check(url):
+        bucket.acquire()
+        return check_url_in_archive(url)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from zip(urls, executor.map(check, urls))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check which reports in the report table already exist in the archive.")
+    parser.add_argument("--reports", default=REPORTS_FILE, help="Report table (.parquet), or an old clean reports CSV.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Maximum concurrent requests.")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Maximum requests per second.")
+    parser.add_argument("--live", action="store_true", help="Query url_filter for every URL instead of only for those missing from the archive index.")
+    parser.add_argument("--refresh-index", action="store_true", help="Re-fetch the archive index even if the cache is fresh.")
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE, help="Seconds before the cached archive index is stale.")
+    parser.add_argument("--recheck", action="store_true", help="Also check URLs the catalog already marks as archived.")
+    return parser.parse_args()
 
 def main():
-    print(f"Reading from {CSV_FILE}...")
-    
+    args = parse_args()
+    print(f"Reading from {args.reports}...")
+
     try:
-        with open(CSV_FILE, mode='r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            
-            total_checked = 0
-            found_count = 0
-            missing_count = 0
-            
-            for row in reader:
-                url = row.get('url')
-                if not url:
-                    continue
-                
-                exists = check_url_in_archive(url)
-                total_checked += 1
-                
-                if exists:
-                    print(f"[EXISTS] {url}")
-                    found_count += 1
-                else:
-                    print(f"[MISSING] {url}")
-                    missing_count += 1
-                
-                # Be nice to the API
-                time.sleep(0.1)
-
-            print("\n--- Summary ---")
-            print(f"Total Checked: {total_checked}")
-            print(f"Found in Archive: {found_count}")
-            print(f"Missing from Archive: {missing_count}")
+        urls = report_table.relevant_urls(args.reports)
+
+        total_checked = 0
+        found_count = 0
+        missing_count = 0
+        error_count = 0
+
+        # Reports the catalog already knows are archived need no lookup
+        catalog = load_catalog()
+        known = set() if args.recheck else {url for url in urls if catalog.is_archived(url)}
+        to_check = [url for url in urls if url not in known]
+
+        index = None
+        with metrics.phase("exists"):
+            if args.live:
+                results = list(check_urls(to_check, workers=args.workers, rate=args.rate))
+            else:
+                index = load_archive_index(max_age=args.max_age, refresh=args.refresh_index)
+                # The index only covers accessions tagged with our subject, so a
+                # miss is confirmed with a live lookup before it counts as missing
+                misses = [url for url in to_check if url not in index]
+                live = dict(check_urls(misses, workers=args.workers, rate=args.rate))
+                results = [(url, live[url] if url in live else True) for url in to_check]
+
+        # Printed in the report table's order, catalog hits and lookups alike
+        checked = dict(results)
+        for url in urls:
+            exists = True if url in known else checked[url]
+            total_checked += 1
+
+            if exists is None:
+                print(f"[ERROR] {url}")
+                error_count += 1
+            elif exists:
+                print(f"[EXISTS] {url}")
+                found_count += 1
+                if url not in known:
+                    accession = index.get(url) if index is not None else None
+                    catalog.upsert(url, status=ARCHIVED, accession_id=accession.get('id') if accession else None)
+            else:
+                print(f"[MISSING] {url}")
+                missing_count += 1
+                catalog.upsert(url)
+
+        with metrics.phase("catalog"):
+            catalog.save()
+            report_table.mark_ingested([url for url in urls if url in known or checked[url]], args.reports)
+
+        print("\n--- Summary ---")
+        print(f"Total Checked: {total_checked}")
+        print(f"Found in Archive: {found_count}")
+        print(f"Missing from Archive: {missing_count}")
+        if error_count:
+            print(f"Could not check (API errors): {error_count}")
 
     except FileNotFoundError:
-        print(f"Error: File {CSV_FILE} not found.")
+        print(f"Error: File {args.reports} not found.")
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
 if __name__ == "__main__":
-    main()
+    with metrics.run("check_existing_reports"):
+        main()
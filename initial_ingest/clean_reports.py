@@ -0,0 +1,68 @@
+import argparse
+
+import polars as pl
+
+import relevance
+import report_table
+from report_dates import ISO_FORMAT, parse_dates
+
+# The "Data Cleaning" section of YHLR Exploration.ipynb as a script: drops
+# reports that are not about Sudan (scored by relevance.py from the title and
+# citation) and adds an ISO iso_format_date column,
+# using Polars expressions so the whole table is parsed in one pass. By
+# default the result goes into the typed Parquet report table (see
+# report_table.py), where non-Sudan reports are kept but flagged; an output
+# ending in .csv writes the old clean CSV instead.
+INPUT_FILE = "yale_reports.csv"
+OUTPUT_FILE = "yhlr_reports.parquet"
+CSV_OUTPUT_FILE = "clean_yhlr_reports.csv"
+
+def clean_reports(df):
+    return (
+        relevance.classify(df)
+        .filter(pl.col("sudan_relevant"))
+        .drop(relevance.COLUMNS)
+        .with_columns(iso_format_date=parse_dates().dt.strftime(ISO_FORMAT))
+    )
+
+def report_relevance(df):
+    """Prints the reports dropped as not about Sudan, and the ones kept with nothing to go on."""
+    scored = relevance.classify(df)
+    for row in scored.filter(~pl.col("sudan_relevant")).iter_rows(named=True):
+        print(f"[NOT SUDAN] {row['title']} (score {row['relevance_score']}: {', '.join(row['relevance_terms'])})")
+    for row in scored.filter(pl.col("relevance_terms").list.len() == 0).iter_rows(named=True):
+        print(f"[UNSURE] {row['title']} (no Sudan or other-topic terms; kept)")
+
+def clean_file(input_file=INPUT_FILE, output_file=OUTPUT_FILE):
+    df = pl.read_csv(input_file, infer_schema=False)
+    clean_df = clean_reports(df)
+    report_relevance(df)
+
+    bad_dates = clean_df.filter(pl.col("iso_format_date").is_null())
+    for row in bad_dates.iter_rows(named=True):
+        print(f"[BAD DATE] {row['date']!r} for {row['url']}")
+    clean_df = clean_df.filter(pl.col("iso_format_date").is_not_null())
+    bad_urls = bad_dates.get_column("url").implode()
+
+    if not str(output_file).endswith(".csv"):
+        table = report_table.merge_reports(
+            report_table.from_csv_frame(df.filter(~pl.col("url").is_in(bad_urls))), output_file
+        )
+        print(f"Flagged {len(df) - len(clean_df) - len(bad_dates)} non-Sudan reports and skipped {len(bad_dates)} with bad dates.")
+        print(f"Wrote {len(table)} reports to {output_file} ({table.filter(report_table.PENDING).height} pending).")
+        return table
+
+    clean_df.write_csv(output_file)
+    print(f"Removed {len(df) - len(clean_df) - len(bad_dates)} non-Sudan reports and {len(bad_dates)} with bad dates.")
+    print(f"Wrote {len(clean_df)} clean reports to {output_file}")
+    return clean_df
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean the scraped Yale reports CSV into the report table for ingestion.")
+    parser.add_argument("--input", default=INPUT_FILE)
+    parser.add_argument("--output", default=OUTPUT_FILE, help=f"Parquet report table, or a .csv path (e.g. {CSV_OUTPUT_FILE}) for the old clean CSV.")
+    args = parser.parse_args()
+    clean_file(args.input, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import requests
+from bs4 import BeautifulSoup
+
+import metrics
+from http_session import make_session
+from rate_limit import TokenBucket
+from report_parser import DEFAULT_PARSER, PARSERS, URL, reports_from_soup
+
+# Crawls report listing pages from a set of seeds: each fetched page is
+# parsed for reports and for more listing pages (pagination, sibling report
+# pages) inside the crawl scope, which are fetched concurrently. Requests to
+# any one host are capped in number and rate, so adding seeds on the same site
+# doesn't hammer it. Every page is fetched at most once and every report URL
+# is reported once, by the first page it was seen on.
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 4 # concurrent requests to one host
+DEFAULT_HOST_RATE = 5 # requests per second to one host
+DEFAULT_MAX_PAGES = 50
+TIMEOUT = (5, 30) # connect, read
+
+# Query parameters that only change what a page looks like, not what it lists
+IGNORED_PARAMS = {"utm_source", "utm_medium", "utm_campaign", "utm_content", "utm_term"}
+# Links a listing uses for its other pages
+PAGER_CLASSES = ["pager", "pagination", "pager__items", "pager__item", "js-pager__items"]
+
+def normalize_url(url):
+    """Drops the fragment and tracking parameters and sorts the query, so one page has one URL."""
+    parts = urlsplit(url)
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in IGNORED_PARAMS))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, ""))
+
+def default_scope(seeds):
+    """Each seed's own directory: a listing's pagination and the pages below it."""
+    scope = []
+    for seed in seeds:
+        parts = urlsplit(normalize_url(seed))
+        scope.append(urlunsplit((parts.scheme, parts.netloc, parts.path.rsplit("/", 1)[0] + "/", "", "")))
+    return scope
+
+def in_scope(url, scope):
+    return any(url.startswith(prefix) for prefix in scope)
+
+def find_listing_links(soup, page_url, scope):
+    """
+    Yields listing pages linked from `soup`: rel="next"/"prev" and pager links
+    anywhere on the same host, and any other link inside the scope.
+    """
+    host = urlsplit(page_url).netloc
+    pager_links = {id(a) for container in soup.find_all(class_=PAGER_CLASSES) for a in container.find_all("a")}
+    for a in soup.find_all("a", href=True):
+        url = normalize_url(urljoin(page_url, a["href"]))
+        if not url.startswith(("http://", "https://")):
+            continue
+        rel = a.get("rel") or ()
+        paging = "next" in rel or "prev" in rel or id(a) in pager_links
+        if (paging and urlsplit(url).netloc == host) or in_scope(url, scope):
+            yield url
+
+class HostLimiter:
+    """
+    Per-host politeness: at most `per_host` requests in flight and `rate`
+    requests per second to any one host.
+    """
+
+    def __init__(self, per_host=DEFAULT_PER_HOST, rate=DEFAULT_HOST_RATE):
+        self.per_host = per_host
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.slots = {}
+        self.buckets = {}
+
+    def _limits(self, host):
+        with self.lock:
+            if host not in self.slots:
+                self.slots[host] = threading.BoundedSemaphore(self.per_host)
+                self.buckets[host] = TokenBucket(self.rate, capacity=self.per_host)
+            return self.slots[host], self.buckets[host]
+
+    def fetch(self, session, url):
+        slot, bucket = self._limits(urlsplit(url).netloc)
+        with slot:
+            bucket.acquire()
+            return session.get(url, timeout=TIMEOUT)
+
+def crawl(seeds, scope=None, parser=DEFAULT_PARSER, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST,
+          host_rate=DEFAULT_HOST_RATE, max_pages=DEFAULT_MAX_PAGES, session=None, unique=True):
+    """
+    Yields (page_url, order, reports, error) as each page finishes, where
+    `order` is the page's position in discovery order. With `unique`, reports
+    holds only reports no earlier-finished page already yielded. Pages that
+    fail to fetch come back with an error and no reports.
+    """
+    seeds = [normalize_url(seed) for seed in seeds]
+    scope = [normalize_url(prefix) for prefix in scope] if scope else default_scope(seeds)
+    limiter = HostLimiter(per_host, host_rate)
+    session = session or make_session(workers)
+    seen_pages = {}
+    seen_reports = set()
+
+    def fetch_and_parse(url):
+        with metrics.phase("fetch"):
+            response = limiter.fetch(session, url)
+            response.raise_for_status()
+        with metrics.phase("parse"):
+            soup = BeautifulSoup(response.content, parser)
+            return reports_from_soup(soup), list(find_listing_links(soup, response.url, scope))
+
+    def enqueue(executor, pending, url):
+        if url in seen_pages or len(seen_pages) >= max_pages:
+            return
+        seen_pages[url] = len(seen_pages)
+        pending[executor.submit(fetch_and_parse, url)] = url
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        for seed in seeds:
+            enqueue(executor, pending, seed)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                url = pending.pop(future)
+                try:
+                    reports, links = future.result()
+                except requests.RequestException as e:
+                    yield url, seen_pages[url], [], e
+                    continue
+                for link in links:
+                    enqueue(executor, pending, link)
+                if unique:
+                    reports = [report for report in reports if report["url"] not in seen_reports]
+                    seen_reports.update(report["url"] for report in reports)
+                yield url, seen_pages[url], reports, None
+
+def crawl_reports(seeds, **kwargs):
+    """
+    Crawls to completion and returns (reports, pages, errors): reports in page
+    discovery order then page order, so the result doesn't depend on which
+    page happened to answer first.
+    """
+    pages = []
+    errors = {}
+    for url, order, reports, error in crawl(seeds, unique=False, **kwargs):
+        pages.append((order, url, reports))
+        if error is not None:
+            errors[url] = error
+    pages.sort()
+    seen = set()
+    ordered = []
+    for _, _, reports in pages:
+        for report in reports:
+            if report["url"] not in seen:
+                seen.add(report["url"])
+                ordered.append(report)
+    return ordered, [url for _, url, _ in pages], errors
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Crawl report listing pages and print every report found, one JSON object per line.")
+    parser.add_argument("--seed", action="append", help=f"Listing page to start from (repeatable). Default: {URL}")
+    parser.add_argument("--scope", action="append", help="URL prefix a page must start with to be followed (repeatable). Default: each seed's directory.")
+    parser.add_argument("--parser", choices=PARSERS, default=DEFAULT_PARSER, help="BeautifulSoup parser backend.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Maximum concurrent requests overall.")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST, help="Maximum concurrent requests to one host.")
+    parser.add_argument("--host-rate", type=float, default=DEFAULT_HOST_RATE, help="Maximum requests per second to one host.")
+    parser.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES, help="Stop following links after this many pages.")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    counts = defaultdict(int)
+    for url, _, reports, error in crawl(args.seed or [URL], args.scope, args.parser, args.workers,
+                                        args.per_host, args.host_rate, args.max_pages):
+        if error is not None:
+            print(f"[ERROR] {url}: {error}", file=sys.stderr)
+            counts["errors"] += 1
+            continue
+        counts["pages"] += 1
+        counts["reports"] += len(reports)
+        for report in reports:
+            print(json.dumps({**report, "page": url}))
+    print(f"[CRAWL] {counts['pages']} pages, {counts['reports']} reports, {counts['errors']} errors "
+          f"in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    with metrics.run("crawl_frontier"):
+        main()
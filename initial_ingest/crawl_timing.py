@@ -0,0 +1,70 @@
+import random
+import statistics
+
+# When to look for a submitted crawl in the archive. Past crawl durations
+# (kept in the state store) give the expected time to completion, so the
+# first check lands close to it; after that checks back off exponentially.
+POLL_INTERVAL = 5 # seconds; backoff base, and the first wait with no history
+MAX_POLL_INTERVAL = 60 # seconds
+DEFAULT_TIMEOUT = 15 * 60 # seconds, until there is history to go on
+MIN_TIMEOUT = 2 * 60 # seconds
+TIMEOUT_FACTOR = 2.0 # times the slowest typical (95th percentile) crawl
+FIRST_CHECK_FACTOR = 0.9 # first check just before the expected finish
+MIN_SAMPLES = 3
+
+class PollSchedule:
+    """
+    Poll timing built from observed crawls: (seconds, document size in bytes
+    or None) pairs. With enough sized samples the expected duration is a
+    linear fit against size, otherwise the median.
+    """
+
+    def __init__(self, samples=()):
+        self.samples = [(seconds, size) for seconds, size in samples if seconds and seconds > 0]
+        self.durations = sorted(seconds for seconds, _ in self.samples)
+        self.fit = self._fit_size()
+
+    def _fit_size(self):
+        sized = [(size, seconds) for seconds, size in self.samples if size]
+        if len(sized) < MIN_SAMPLES or len({size for size, _ in sized}) < 2:
+            return None
+        slope, intercept = statistics.linear_regression(*zip(*sized))
+        return (slope, intercept) if slope > 0 else None
+
+    def expected(self, size=None):
+        """Expected crawl duration in seconds, or None with too little history."""
+        if len(self.durations) < MIN_SAMPLES:
+            return None
+        if size and self.fit:
+            slope, intercept = self.fit
+            return max(POLL_INTERVAL, intercept + slope * size)
+        return statistics.median(self.durations)
+
+    def first_wait(self, size=None, elapsed=0.0):
+        """Seconds to wait before the first check of a crawl posted `elapsed` seconds ago."""
+        expected = self.expected(size)
+        if expected is None:
+            return POLL_INTERVAL
+        return max(0.0, expected * FIRST_CHECK_FACTOR - elapsed)
+
+    def next_wait(self, attempt):
+        """
+        Wait after the `attempt`-th check missed: doubles each time up to
+        MAX_POLL_INTERVAL, with jitter so parallel pollers spread out.
+        """
+        wait = min(MAX_POLL_INTERVAL, POLL_INTERVAL * 2 ** (attempt - 1))
+        return wait / 2 + random.uniform(0, wait / 2)
+
+    def is_due(self, due, now):
+        """
+        A check due within the next POLL_INTERVAL counts as due now, so one
+        shared listing fetch serves crawls whose checks are close together.
+        """
+        return due <= now + POLL_INTERVAL
+
+    def timeout(self, size=None):
+        """Seconds after posting at which a crawl is given up on for this run."""
+        if len(self.durations) < MIN_SAMPLES:
+            return DEFAULT_TIMEOUT
+        slowest = statistics.quantiles(self.durations, n=20, method="inclusive")[-1]
+        return max(MIN_TIMEOUT, TIMEOUT_FACTOR * max(slowest, self.expected(size)))
@@ -0,0 +1,150 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import requests
+
+import metrics
+from catalog import ARCHIVED, document_id, load_catalog
+
+# Content-addressed copies of report PDFs: .cache/documents/ab/abcdef....pdf,
+# named by SHA-256. Yale sometimes republishes the same file under a new
+# documents/<uuid> URL; comparing hashes catches that before we pay for a crawl.
+# Only the hash and size are needed after that, so both go in the catalog and
+# the copy is deleted; `prune` clears copies left by older runs.
+STORE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "documents"
+CHUNK_SIZE = 64 * 1024
+TIMEOUT = (5, 60) # connect, read
+
+def document_path(content_hash, store_dir=STORE_DIR):
+    return Path(store_dir) / content_hash[:2] / f"{content_hash}.pdf"
+
+def store_document(url, session=None, store_dir=STORE_DIR):
+    """
+    Streams `url` to disk in CHUNK_SIZE pieces, hashing as it goes, and files
+    it under its SHA-256. Returns (content_hash, path, size). Memory use is
+    one chunk regardless of the document size.
+    """
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+
+    with (session or requests).get(url, stream=True, timeout=TIMEOUT, hooks={"response": metrics.response_hook}) as response:
+        response.raise_for_status()
+        fd, tmp = tempfile.mkstemp(dir=store_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            content_hash = digest.hexdigest()
+            path = document_path(content_hash, store_dir)
+            path.parent.mkdir(exist_ok=True)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    return content_hash, path, size
+
+def stored_size(catalog, url, store_dir=STORE_DIR):
+    """Size in bytes of `url`'s document, or None if it was never hashed."""
+    entry = catalog.get(url)
+    if not entry or not entry.get("content_hash"):
+        return None
+    if entry.get("size") is not None:
+        return entry["size"]
+    # Hashed before sizes were catalogued: the copy may still be on disk
+    try:
+        return document_path(entry["content_hash"], store_dir).stat().st_size
+    except FileNotFoundError:
+        return None
+
+def hash_document(url, catalog, session=None):
+    """
+    Streams `url` through the store, records its hash and size in the catalog
+    and deletes the copy. Returns (content_hash, size).
+    """
+    content_hash, path, size = store_document(url, session)
+    catalog.upsert(url, content_hash=content_hash, size=size)
+    path.unlink(missing_ok=True)
+    return content_hash, size
+
+def prune(catalog, store_dir=STORE_DIR):
+    """Deletes stored copies whose hash the catalog already has. Returns (files, bytes)."""
+    hashes = {entry["content_hash"] for entry in catalog if entry.get("content_hash")}
+    files = freed = 0
+    for path in Path(store_dir).glob("*/*.pdf"):
+        if path.stem in hashes:
+            freed += path.stat().st_size
+            path.unlink()
+            files += 1
+    return files, freed
+
+def find_duplicate(catalog, url, content_hash):
+    """
+    Returns the archived catalog entry for another URL with the same content,
+    or None.
+    """
+    doc_id = document_id(url)
+    for entry in catalog.with_content_hash(content_hash):
+        if entry.get("status") == ARCHIVED and document_id(entry["url"]) != doc_id:
+            return entry
+    return None
+
+def check_document(url, catalog, session=None):
+    """
+    Hashes the document behind `url`, records the hash in the catalog and
+    returns (content_hash, duplicate_entry_or_None).
+    """
+    content_hash, _ = hash_document(url, catalog, session)
+    return content_hash, find_duplicate(catalog, url, content_hash)
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash report documents to catch republished duplicates.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    check = subparsers.add_parser("check", help="Download and hash a URL; report an archived duplicate if any.")
+    check.add_argument("url")
+
+    subparsers.add_parser("backfill", help="Hash every archived catalog entry that has no content_hash yet.")
+    subparsers.add_parser("prune", help="Delete stored documents whose hash is already in the catalog.")
+
+    args = parser.parse_args()
+    catalog = load_catalog()
+
+    if args.command == "check":
+        with metrics.phase("hash"):
+            content_hash, duplicate = check_document(args.url, catalog)
+        catalog.save()
+        print(json.dumps({
+            "url": args.url,
+            "content_hash": content_hash,
+            "duplicate_of": duplicate and {"url": duplicate["url"], "accession_id": duplicate.get("accession_id")},
+        }, indent=2))
+        sys.exit(1 if duplicate else 0)
+    elif args.command == "backfill":
+        with requests.Session() as session, metrics.phase("hash"):
+            for entry in list(catalog):
+                if entry.get("status") != ARCHIVED or entry.get("content_hash"):
+                    continue
+                try:
+                    content_hash, size = hash_document(entry["url"], catalog, session)
+                except (requests.RequestException, OSError) as e:
+                    print(f"[ERROR] {entry['url']}: {e}")
+                    continue
+                print(f"[HASHED] {content_hash[:12]} {size:>9} bytes {entry['url']}")
+        catalog.save()
+    elif args.command == "prune":
+        files, freed = prune(catalog)
+        print(f"Deleted {files} stored document(s), {freed} bytes.")
+
+if __name__ == "__main__":
+    with metrics.run("document_store"):
+        main()
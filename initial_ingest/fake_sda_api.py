@@ -0,0 +1,319 @@
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# Local stand-in for the parts of the SDA API the ingest scripts use, plus the
+# Yale reports page and its documents, so the real code can run and be timed
+# with no network.
+API_PREFIX = "/sda-api/api/v1"
+REPORTS_PATH = "/lab/khoshnood/publications/reports/"
+DOCUMENTS_PREFIX = "/documents/"
+FIXTURE_PAGE = Path(__file__).resolve().parent / "fixtures" / "yale_reports_page.html"
+
+class FakeSdaApi:
+    """
+    In-memory accessions and metadata subjects behind a threaded HTTP server.
+
+    latency       seconds added to every request
+    crawl_delay   seconds between a POSTed accession and it appearing in listings
+    error_rate    fraction of API requests answered with 500
+    throttle_rate fraction of API requests answered with 429 and a Retry-After
+    """
+
+    def __init__(self, latency=0.0, crawl_delay=0.0, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=1, page_file=FIXTURE_PAGE, seed=None):
+        self.latency = latency
+        self.crawl_delay = crawl_delay
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.page = Path(page_file).read_bytes() if page_file else b""
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.accessions = {}
+        self.crawls = [] # (ready_at, accession) not yet visible
+        self.subjects = {}
+        self.pages = {} # extra HTML pages by path (and query), e.g. more listing pages
+        self.requests = 0
+        self.server = None
+        self.thread = None
+
+    # --- state -------------------------------------------------------------
+
+    def add_page(self, path, html):
+        """Serves `html` at `path`, which may carry a query string ("/reports/?page=1")."""
+        parsed = urlparse(path)
+        key = (parsed.path.rstrip("/") or "/") + (f"?{parsed.query}" if parsed.query else "")
+        self.pages[key] = html.encode("utf-8") if isinstance(html, str) else html
+
+    def add_accession(self, url, title="", date=None, subjects=None, description=None, visible=True):
+        with self.lock:
+            accession_id = len(self.accessions) + len(self.crawls) + 1
+            accession = {
+                "id": accession_id,
+                "seed_url": url,
+                "title_en": title,
+                "description_en": description,
+                "dublin_metadata_date": date,
+                "subjects_en_ids": list(subjects or []),
+                "has_english_metadata": True,
+                "is_private": False,
+            }
+            if visible:
+                self.accessions[accession_id] = accession
+            else:
+                self.crawls.append((time.monotonic() + self.crawl_delay, accession))
+            return accession
+
+    def add_subject(self, subject, lang="english", subject_id=None):
+        with self.lock:
+            subject_id = subject_id or max(self.subjects, default=0) + 1
+            self.subjects[subject_id] = {"id": subject_id, "subject": subject, "lang": lang}
+            return subject_id
+
+    def _finish_crawls(self):
+        now = time.monotonic()
+        with self.lock:
+            still_running = []
+            for ready_at, accession in self.crawls:
+                if ready_at <= now:
+                    self.accessions[accession["id"]] = accession
+                else:
+                    still_running.append((ready_at, accession))
+            self.crawls = still_running
+
+    def list_accessions(self, params):
+        self._finish_crawls()
+        url_filter = params.get("url_filter")
+        subject = params.get("metadata_subjects")
+        page = int(params.get("page", 0))
+        per_page = int(params.get("per_page", 20))
+
+        with self.lock:
+            items = list(self.accessions.values())
+        if url_filter:
+            items = [a for a in items if url_filter in a["seed_url"]]
+        if subject:
+            items = [a for a in items if int(subject) in a["subjects_en_ids"]]
+
+        num_pages = max(1, -(-len(items) // per_page))
+        return {
+            "items": items[page * per_page:(page + 1) * per_page],
+            "num_pages": num_pages,
+            "page": page,
+            "per_page": per_page,
+        }
+
+    # --- server ------------------------------------------------------------
+
+    def start(self, host="127.0.0.1", port=0):
+        api = self
+
+        class Handler(FakeSdaHandler):
+            fake = api
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_url(self):
+        return self.base_url + API_PREFIX
+
+    @property
+    def reports_url(self):
+        return self.base_url + REPORTS_PATH
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+class FakeSdaHandler(BaseHTTPRequestHandler):
+    fake = None
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, keep-alive
+    # clients see Nagle + delayed-ACK stalls of ~40ms per request.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _read_json(self):
+        return json.loads(self.body or b"{}")
+
+    def _before(self):
+        """
+        Applies latency and injected failures. Returns True if the request was
+        already answered.
+        """
+        fake = self.fake
+        # Always drain the body so a rejected request doesn't corrupt the
+        # next one on a keep-alive connection
+        self.body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with fake.lock:
+            fake.requests += 1
+        if fake.latency:
+            time.sleep(fake.latency)
+        if not self.path.startswith(API_PREFIX):
+            return False
+        roll = fake.random.random()
+        if roll < fake.throttle_rate:
+            self._send(429, {"error": "Too Many Requests"}, headers={"Retry-After": str(fake.retry_after)})
+            return True
+        if roll < fake.throttle_rate + fake.error_rate:
+            self._send(500, {"error": "Internal Server Error"})
+            return True
+        return False
+
+    def _route(self):
+        parsed = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        return parsed.path.rstrip("/") or "/", params
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        if self._before():
+            return
+        path, params = self._route()
+        fake = self.fake
+        query = urlparse(self.path).query
+        page = fake.pages.get(path + (f"?{query}" if query else ""))
+
+        if page is not None:
+            self._send_cacheable(page, "text/html; charset=utf-8")
+        elif path == API_PREFIX + "/accessions":
+            self._send(200, fake.list_accessions(params))
+        elif path == API_PREFIX + "/metadata-subjects":
+            term = (params.get("query_term") or "").lower()
+            with fake.lock:
+                items = [s for s in fake.subjects.values() if term in s["subject"].lower()]
+            self._send(200, {"items": items})
+        elif path == REPORTS_PATH.rstrip("/"):
+            self._send_cacheable(fake.page, "text/html; charset=utf-8")
+        elif path.startswith(DOCUMENTS_PREFIX):
+            # Deterministic fake PDF per document id
+            doc_id = path[len(DOCUMENTS_PREFIX):]
+            body = b"%PDF-1.4\n" + hashlib.sha256(doc_id.encode()).digest() * 256
+            self._send_cacheable(body, "application/pdf")
+        else:
+            self._send(404, {"error": "Not Found"})
+
+    def _send_cacheable(self, body, content_type):
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, headers={"ETag": etag})
+            return
+        byte_range = re.match(r"bytes=(\d+)-(\d*)$", self.headers.get("Range") or "")
+        if byte_range:
+            start = int(byte_range.group(1))
+            end = int(byte_range.group(2) or len(body) - 1)
+            headers = {"ETag": etag, "Content-Range": f"bytes {start}-{end}/{len(body)}"}
+            self._send(206, body[start:end + 1], content_type, headers)
+            return
+        self._send(200, body, content_type, {"ETag": etag})
+
+    def do_POST(self):
+        if self._before():
+            return
+        path, _ = self._route()
+        payload = self._read_json()
+        fake = self.fake
+
+        if path == API_PREFIX + "/accessions":
+            fake.add_accession(
+                payload["url"],
+                title=payload.get("metadata_title", ""),
+                date=payload.get("metadata_time"),
+                subjects=payload.get("metadata_subjects"),
+                description=payload.get("metadata_description"),
+                visible=False,
+            )
+            self._send(201, b"", "text/plain")
+        elif path == API_PREFIX + "/metadata-subjects":
+            subject_id = fake.add_subject(payload["metadata_subject"], payload.get("lang", "english"))
+            self._send(201, {"id": subject_id, "subject": payload["metadata_subject"]})
+        else:
+            self._send(404, {"error": "Not Found"})
+
+    def do_PUT(self):
+        if self._before():
+            return
+        path, _ = self._route()
+        payload = self._read_json()
+        fake = self.fake
+
+        match = re.fullmatch(re.escape(API_PREFIX) + r"/accessions/(\d+)", path)
+        with fake.lock:
+            accession = fake.accessions.get(int(match.group(1))) if match else None
+            if accession:
+                accession.update({
+                    "title_en": payload.get("metadata_title"),
+                    "description_en": payload.get("metadata_description"),
+                    "dublin_metadata_date": payload.get("metadata_time"),
+                    "subjects_en_ids": list(payload.get("metadata_subjects") or []),
+                    "is_private": payload.get("is_private", False),
+                })
+        if accession:
+            self._send(200, accession)
+        else:
+            self._send(404, {"error": "Not Found"})
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake of the SDA accessions API and the Yale reports page.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request.")
+    parser.add_argument("--crawl-delay", type=float, default=5.0, help="Seconds before a POSTed accession is listed.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of API requests that return 500.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of API requests that return 429.")
+    args = parser.parse_args()
+
+    fake = FakeSdaApi(args.latency, args.crawl_delay, args.error_rate, args.throttle_rate)
+    fake.add_subject("Yale Humanitarian Research Lab", subject_id=37)
+    fake.start(port=args.port)
+    print(f"API:     {fake.api_url}")
+    print(f"Reports: {fake.reports_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import fcntl
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Advisory locks for the JSON files several processes read, change and write
+# back (the manifest, the catalog). The lock is flock() on a "<file>.lock"
+# sibling rather than on the file itself, because writers replace the file
+# with os.replace and a lock on the old inode would protect nothing. The
+# kernel drops the lock when its holder exits, so a crashed run never leaves
+# a stale lock behind. Unix only, like the rest of the tooling.
+DEFAULT_TIMEOUT = 30 # seconds
+POLL_INTERVAL = 0.05 # seconds
+
+class LockTimeout(TimeoutError):
+    """Another process held the lock for longer than we were willing to wait."""
+
+def lock_path(path):
+    path = Path(path)
+    return path.with_name(path.name + ".lock")
+
+@contextmanager
+def locked(path, timeout=DEFAULT_TIMEOUT):
+    """
+    Holds an exclusive lock on `path` for the duration of the block. Every
+    read-modify-write of a shared file should happen inside one.
+    """
+    fd = os.open(lock_path(path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(f"Timed out after {timeout}s waiting for {lock_path(path)}")
+                time.sleep(POLL_INTERVAL)
+        yield
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
+
+def write_json(path, data, sort_keys=True):
+    """
+    Writes `data` atomically: a reader sees either the old file or the new
+    one, never a partial write. The temporary file has a unique name, so
+    concurrent writers don't clobber each other's; the last rename wins. A
+    read-modify-write still needs the file's lock.
+    """
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, sort_keys=sort_keys, ensure_ascii=False)
+            f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
@@ -1,70 +1,40 @@
+import argparse
 import requests
-import os
 import sys
 
-API_BASE_URL = "https://api.sudandigitalarchive.com/sda-api/api/v1/metadata-subjects"
-API_KEY = os.environ.get("SDA_API_KEY")
+import http_cassette
+from sda_client import API_KEY
+from subjects import LANG, YALE_SUBJECT, SubjectNotFound, get_resolver
 
-TARGET_SUBJECT = "Yale Humanitarian Research Lab"
-LANG = "english"
-
-def get_headers():
-    return {
-        "x-api-key": API_KEY,
-        "Content-Type": "application/json"
-    }
-
-def get_subject_id():
-    # 1. Search for the subject
-    print(f"Searching for subject: '{TARGET_SUBJECT}'...")
+def get_subject_id(subject=YALE_SUBJECT, lang=LANG, refresh=False):
+    """
+    Returns the id for `subject`, from the local cache when it is fresh,
+    otherwise by searching the API and creating the subject if it is missing.
+    """
+    print(f"Resolving subject: '{subject}' ({lang})...")
     try:
-        response = requests.get(
-            API_BASE_URL, 
-            params={"query_term": TARGET_SUBJECT, "lang": LANG},
-            headers=get_headers()
-        )
-        response.raise_for_status()
-        data = response.json()
-        
-        # Check if items exist
-        items = data.get('items', [])
-        for item in items:
-            if item.get('subject') == TARGET_SUBJECT:
-                print(f"Found existing subject ID: {item.get('id')}")
-                return item.get('id')
-        
-        print("Subject not found.")
-        
-    except requests.RequestException as e:
-        print(f"Error searching for subject: {e}")
+        return get_resolver().resolve(subject, lang, create=True, refresh=refresh)
+    except (requests.RequestException, SubjectNotFound) as e:
+        print(f"Error resolving subject: {e}")
+        if getattr(e, "response", None) is not None and e.response.text:
+            print(f"Error details: {e.response.text}")
         return None
 
-    # 2. Create if not found
-    print(f"Creating subject: '{TARGET_SUBJECT}'...")
-    payload = {
-        "metadata_subject": TARGET_SUBJECT,
-        "lang": LANG
-    }
-    
-    try:
-        response = requests.post(API_BASE_URL, json=payload, headers=get_headers())
-        response.raise_for_status()
-        data = response.json()
-        new_id = data.get('id')
-        print(f"Successfully created subject. ID: {new_id}")
-        return new_id
-    except requests.RequestException as e:
-        print(f"Error creating subject: {e}")
-        if response.text:
-            print(f"Error details: {response.text}")
-        return None
+def parse_args():
+    parser = argparse.ArgumentParser(description="Find or create a metadata subject and print its id.")
+    parser.add_argument("--subject", default=YALE_SUBJECT)
+    parser.add_argument("--lang", default=LANG, choices=["english", "arabic"])
+    parser.add_argument("--refresh", action="store_true", help="Ignore the cached id and ask the API.")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
     if not API_KEY:
         print("Error: SDA_API_KEY environment variable not set.")
         sys.exit(1)
-        
-    subject_id = get_subject_id()
+
+    http_cassette.install_from_env()
+    subject_id = get_subject_id(args.subject, args.lang, args.refresh)
     if subject_id:
         print(f"\nFinal Subject ID: {subject_id}")
     else:
@@ -0,0 +1,203 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from file_lock import write_json
+
+# Record/replay for every HTTP request the scripts make, at the transport
+# level: install() wraps HTTPAdapter.send, which every requests.get() and
+# Session goes through, so the scripts' own code paths (retries, hooks,
+# streaming, redirects) run unchanged.
+#
+#   INGEST_HTTP=record  make real requests and save each response to the cassette
+#   INGEST_HTTP=replay  answer from the cassette only; an unrecorded request
+#                       fails like a connection error
+#   INGEST_CASSETTE     cassette file (default .cache/cassettes/default.json);
+#                       recording adds to it, so delete it to record afresh
+#   INGEST_REPLAY_LATENCY  "recorded" to sleep as long as the original
+#                       response took, or seconds per request (default 0)
+#
+# Requests are matched on method, URL (query sorted), the headers that change
+# the answer and a hash of the body. Repeats of one request replay its
+# recorded responses in order and then keep returning the last, so polling
+# loops see the archive change as it did when recorded. Credentials are never
+# written: no request headers are stored. Binary or large bodies (the PDFs)
+# are kept as files named by their SHA-256 in a <cassette>.bodies directory
+# beside the cassette, so the JSON stays small and a PDF fetched twice is
+# stored once.
+CASSETTE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "cassettes"
+DEFAULT_CASSETTE = CASSETTE_DIR / "default.json"
+MODES = ("record", "replay")
+
+# Request headers that select a different response for the same URL
+MATCH_HEADERS = ("Range", "If-None-Match", "If-Modified-Since")
+# Response headers worth keeping; the rest are connection noise
+# (bodies are stored decoded, so Content-Encoding is dropped too).
+KEEP_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Location", "Retry-After", "Content-Range")
+INLINE_MAX = 64 * 1024 # bytes of text kept in the cassette itself
+
+class CassetteMiss(requests.ConnectionError):
+    """A replayed run asked for a request that was never recorded."""
+
+def request_key(request):
+    parts = urlsplit(request.url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    url = urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    headers = [f"{name}={request.headers[name]}" for name in MATCH_HEADERS if request.headers.get(name)]
+    return " ".join([request.method, url, *headers, hashlib.sha256(body).hexdigest()[:16] if body else ""]).strip()
+
+class Cassette:
+    def __init__(self, path=DEFAULT_CASSETTE):
+        self.path = Path(path)
+        self.bodies_dir = self.path.with_name(self.path.stem + ".bodies")
+        self.lock = threading.Lock()
+        self.interactions = {} # key -> [recorded response, ...]
+        self.played = {} # key -> how many have been replayed
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                self.interactions = json.load(f).get("interactions", {})
+
+    def __len__(self):
+        return sum(len(responses) for responses in self.interactions.values())
+
+    def record(self, request, response):
+        # Reads the whole body; streaming callers then read it from memory
+        body = response.content
+        entry = {
+            "status": response.status_code,
+            "reason": response.reason,
+            "url": response.url,
+            "headers": {name: response.headers[name] for name in KEEP_HEADERS if name in response.headers},
+            "elapsed": response.elapsed.total_seconds(),
+            "recorded_at": time.time(),
+        }
+        try:
+            text = body.decode("utf-8") if len(body) <= INLINE_MAX else None
+        except UnicodeDecodeError:
+            text = None
+        if text is None:
+            entry["body_file"] = self.save_body(body)
+        else:
+            entry["text"] = text
+        with self.lock:
+            self.interactions.setdefault(request_key(request), []).append(entry)
+
+    def save_body(self, body):
+        name = hashlib.sha256(body).hexdigest()
+        path = self.bodies_dir / name
+        if not path.exists():
+            self.bodies_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, path)
+        return name
+
+    def load_body(self, entry):
+        if "body_file" in entry:
+            return (self.bodies_dir / entry["body_file"]).read_bytes()
+        # Cassettes recorded before side files kept binary bodies inline
+        if "base64" in entry:
+            return base64.b64decode(entry["base64"])
+        return entry["text"].encode("utf-8")
+
+    def next_response(self, request):
+        key = request_key(request)
+        with self.lock:
+            responses = self.interactions.get(key)
+            if not responses:
+                return None
+            index = self.played.get(key, 0)
+            self.played[key] = index + 1
+            return responses[min(index, len(responses) - 1)]
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            write_json(self.path, {"interactions": self.interactions})
+
+def build_response(adapter, request, entry, body):
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.reason = entry.get("reason")
+    response.url = entry.get("url") or request.url
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response.headers["Content-Length"] = str(len(body))
+    # Read through raw like a live response, so stream=True and iter_content work
+    response.raw = io.BytesIO(body)
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.elapsed = timedelta(seconds=entry.get("elapsed", 0.0))
+    response.request = request
+    response.connection = adapter
+    return response
+
+_installed = None # (mode, cassette, latency)
+_original_send = HTTPAdapter.send
+
+def _send(adapter, request, **kwargs):
+    mode, cassette, latency = _installed
+    if mode == "record":
+        response = _original_send(adapter, request, **kwargs)
+        cassette.record(request, response)
+        return response
+
+    entry = cassette.next_response(request)
+    if entry is None:
+        raise CassetteMiss(f"No recorded response for {request_key(request)} in {cassette.path}", request=request)
+    delay = entry.get("elapsed", 0.0) if latency == "recorded" else latency
+    if delay:
+        time.sleep(delay)
+    return build_response(adapter, request, entry, cassette.load_body(entry))
+
+def install(mode, path=DEFAULT_CASSETTE, latency=0.0):
+    """
+    Routes every request through the cassette at `path`. In record mode the
+    cassette is saved at exit (and by save()).
+    """
+    global _installed
+    if mode not in MODES:
+        raise ValueError(f"Unknown HTTP mode {mode!r}; expected one of {MODES}")
+    cassette = Cassette(path)
+    _installed = (mode, cassette, latency)
+    HTTPAdapter.send = _send
+    if mode == "record":
+        import atexit
+
+        atexit.register(cassette.save)
+    return cassette
+
+def uninstall():
+    global _installed
+    HTTPAdapter.send = _original_send
+    _installed = None
+
+def save():
+    if _installed and _installed[0] == "record":
+        _installed[1].save()
+
+def install_from_env():
+    """Installs the mode INGEST_HTTP asks for, once. Returns the cassette or None."""
+    mode = os.environ.get("INGEST_HTTP")
+    if not mode or mode == "live":
+        return None
+    if _installed:
+        return _installed[1]
+    latency = os.environ.get("INGEST_REPLAY_LATENCY") or "0"
+    cassette = install(mode, os.environ.get("INGEST_CASSETTE") or DEFAULT_CASSETTE,
+                       latency if latency == "recorded" else float(latency))
+    print(f"[HTTP] {mode} via {cassette.path} ({len(cassette)} recorded responses)", file=sys.stderr)
+    return cassette
@@ -0,0 +1,16 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# Pooled requests sessions for the scripts that fetch many URLs at once (the
+# listing crawler, the link checker). Every response is counted by metrics.
+DEFAULT_POOL_SIZE = 16
+
+def make_session(pool_size=DEFAULT_POOL_SIZE):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.hooks["response"].append(metrics.response_hook)
+    return session
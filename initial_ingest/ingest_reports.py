@@ -1,104 +1,173 @@
-import csv
+import argparse
 import requests
 import time
-import os
-import shutil
-from tempfile import NamedTemporaryFile
-
-CSV_FILE = "clean_yhlr_reports.csv"
-API_BASE_URL = "https://api.sudandigitalarchive.com/sda-api/api/v1/accessions"
-API_KEY = os.environ.get("SDA_API_KEY")
-SUBJECT_ID = 37 # Yale Humanitarian Research Lab
-
-def get_headers():
-    return {
-        "x-api-key": API_KEY,
-        "Content-Type": "application/json"
-    }
+from collections import deque
+
+from archive_index import ArchiveIndex, load_archive_index
+from catalog import ARCHIVED, load_catalog, to_iso_date
+from catalog import SKIPPED as CATALOG_SKIPPED
+from crawl_timing import PollSchedule
+from document_store import check_document, stored_size
+from link_check import find_broken_links
+import metrics
+import report_table
+from sda_client import API_KEY, get_client, may_have_acted
+from state_store import CONFIRMED, FAILED, PENDING, POSTED, SKIPPED, UNKNOWN, StateStore
+from subjects import resolve_subject_id
+
+REPORTS_FILE = report_table.REPORTS_FILE
+# Crawls posted before this were submitted by an earlier run
+STARTED_AT = time.time()
+# Catalog saves rewrite the whole file, so changes are written in batches;
+# the state store, not the catalog, is what a crashed run resumes from.
+CATALOG_SAVE_EVERY = 25 # changed entries
+# A crawl whose POST outcome was unknown is polled across runs like a posted
+# one, and only posted again once it is this old and still hasn't appeared
+UNKNOWN_MAX_AGE = 24 * 60 * 60 # seconds
 
 def check_url_in_archive(url):
     """
     Checks if the URL exists in the archive using the url_filter.
-    Returns True if found, False otherwise.
+    Returns True if found, False if not, and None if the API couldn't answer.
     """
     try:
-        response = requests.get(API_BASE_URL, params={"url_filter": url}, headers=get_headers())
-        response.raise_for_status()
-        data = response.json()
-        
-        # Access 'items' if present, otherwise assume list
-        results = data.get('items', data) if isinstance(data, dict) else data
-        return len(results) > 0
+        return get_client().url_exists(url)
     except requests.RequestException as e:
         print(f"   [!] API Check Error for {url}: {e}")
+        return None
+
+def save_catalog(catalog, force=False):
+    """Saves the catalog once CATALOG_SAVE_EVERY entries have changed, or now with `force`."""
+    if catalog.changed and (force or len(catalog.changed) >= CATALOG_SAVE_EVERY):
+        with metrics.phase("catalog"):
+            catalog.save()
+
+def mark_confirmed(url, store, catalog, accession=None):
+    store.set_status(url, CONFIRMED)
+    catalog.upsert(url, status=ARCHIVED, accession_id=accession.get('id') if accession else None)
+    save_catalog(catalog)
+
+def record_crawl_time(url, store, catalog):
+    """
+    Stores how long the crawl took so future polling can be timed by it. A
+    crawl posted by an earlier run is left out: nobody polled it between the
+    runs, so the time since the POST says nothing about crawl latency.
+    """
+    posted_at = store.posted_at(url)
+    if posted_at and posted_at >= STARTED_AT:
+        store.record_crawl_time(url, time.time() - posted_at, stored_size(catalog, url))
+
+def give_up_unknown(url, store):
+    """
+    A crawl whose POST outcome was unknown and that still hasn't shown up
+    UNKNOWN_MAX_AGE after the POST was never submitted; failing it lets the
+    next run post it again, after the usual existence check. Younger ones stay
+    'unknown' and are polled again next run, since a slow crawl may yet appear.
+    """
+    posted_at = store.posted_at(url)
+    if store.status(url) == UNKNOWN and posted_at and time.time() - posted_at > UNKNOWN_MAX_AGE:
+        store.set_status(url, FAILED, error="POST outcome unknown and the crawl never appeared")
+
+def wait_for_confirmation(url, store, catalog):
+    """
+    Blocks until the URL shows up in the archive, then marks it confirmed.
+    The first check comes close to when past crawls of similar documents
+    finished, later ones back off. On timeout the crawl stays 'posted' (or
+    'unknown') so the next run resumes polling it; an unknown one is only
+    failed, and posted again, once it is older than UNKNOWN_MAX_AGE.
+    """
+    schedule = PollSchedule(store.crawl_times())
+    size = stored_size(catalog, url)
+    posted_at = store.posted_at(url) or time.time()
+    timeout = schedule.timeout(size)
+    wait = schedule.first_wait(size, time.time() - posted_at)
+
+    print(f"   [POLL] Waiting {wait:.0f}s for record to appear in archive (timeout {timeout:.0f}s)...")
+    attempt = 1
+    while True:
+        with metrics.phase("poll"):
+            time.sleep(wait)
+            found = check_url_in_archive(url)
+        if found:
+            print(f"   [SUCCESS] Record confirmed in archive after {attempt} attempts.")
+            break
+
+        # Safety break so a crawl that never shows up doesn't block the run
+        remaining = posted_at + timeout - time.time()
+        if remaining <= 0:
+            print("   [TIMEOUT] Waited too long. Moving on, but NOT marking as ingested.")
+            give_up_unknown(url, store)
+            return False
+
+        wait = min(schedule.next_wait(attempt), remaining)
+        print(f"   [POLL] Attempt {attempt}: Not found yet. Waiting {wait:.0f}s...")
+        attempt += 1
+
+    record_crawl_time(url, store, catalog)
+    mark_confirmed(url, store, catalog)
+    print("   [DONE] State updated.")
+    return True
+
+def is_duplicate_document(url, store, catalog):
+    """
+    Hashes the document and checks the catalog for an archived report with
+    the same content. A download or disk failure is not treated as a duplicate.
+    """
+    print("   [HASH] Downloading document to compare content...")
+    try:
+        with metrics.phase("hash"):
+            content_hash, duplicate = check_document(url, catalog)
+    except (requests.RequestException, OSError) as e:
+        # A full disk or unwritable store is no reason to hold the crawl back
+        print(f"   [!] Could not hash document, crawling anyway: {e}")
         return False
+    if duplicate is None:
+        return False
+
+    accession_id = duplicate.get('accession_id')
+    print(f"   [DUPLICATE] Same document (sha256 {content_hash[:12]}) is archived as {duplicate['url']}"
+          f"{f' (accession {accession_id})' if accession_id else ''}. Not submitting a crawl.")
+    catalog.upsert(url, status=CATALOG_SKIPPED, accession_id=accession_id)
+    save_catalog(catalog)
+    store.set_status(url, SKIPPED, error=f"duplicate of {duplicate['url']}")
+    return True
 
-def initialize_csv():
-    """
-    Ensures the CSV has an 'ingested' column.
-    """
-    temp_file = NamedTemporaryFile(mode='w', delete=False, encoding='utf-8', newline='')
-    shutil.copy(CSV_FILE, CSV_FILE + ".bak") # Backup just in case
-    
-    renamed = False
-    
-    with open(CSV_FILE, mode='r', encoding='utf-8') as csvfile, temp_file:
-        reader = csv.DictReader(csvfile)
-        fieldnames = reader.fieldnames
-        
-        if 'ingested' not in fieldnames:
-            print("Adding 'ingested' column to CSV...")
-            fieldnames.append('ingested')
-            writer = csv.DictWriter(temp_file, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in reader:
-                row['ingested'] = 'False'
-                writer.writerow(row)
-            renamed = True
-        else:
-            # File is already good, just close temp
-            pass
-
-    if renamed:
-        shutil.move(temp_file.name, CSV_FILE)
-    else:
-        os.remove(temp_file.name)
-
-def update_csv_state(url, status):
-    """
-    Updates the 'ingested' status for a specific URL in the CSV.
-    Inefficient but safe: reads all, updates one, writes all.
-    """
-    temp_file = NamedTemporaryFile(mode='w', delete=False, encoding='utf-8', newline='')
-    
-    with open(CSV_FILE, mode='r', encoding='utf-8') as csvfile, temp_file:
-        reader = csv.DictReader(csvfile)
-        fieldnames = reader.fieldnames
-        writer = csv.DictWriter(temp_file, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for row in reader:
-            if row['url'] == url:
-                row['ingested'] = str(status)
-            writer.writerow(row)
-            
-    shutil.move(temp_file.name, CSV_FILE)
-
-def ingest_report(row):
+def submit_report(row, index, store, catalog, dedupe=True):
+    """
+    Runs the local and remote existence checks and POSTs the crawl if needed.
+    Returns True when a new crawl was, or may have been, submitted and awaits
+    confirmation.
+    With `dedupe`, the document is hashed first and not crawled again if the
+    same file is already archived under another URL.
+    """
     url = row['url']
-    print(f"\nProcessing: {url}")
-    
+
     # 1. Check local state
-    if row.get('ingested') == 'True':
-        print("   [SKIP] Marked as ingested in CSV.")
-        return
+    if store.status(url) == CONFIRMED:
+        print("   [SKIP] Marked as ingested in state store.")
+        return False
+    if catalog.is_archived(url):
+        print("   [SKIP] Marked as archived in catalog.")
+        store.set_status(url, CONFIRMED)
+        return False
+    catalog.upsert(url, title=row.get('title'), date=to_iso_date(row.get('iso_format_date')))
 
     # 2. Check remote state (Idempotency)
+    # The index only covers accessions already tagged with our subject, so a miss
+    # is confirmed with a live lookup before we pay for a crawl.
     print("   [CHECK] Verifying existence in archive...")
-    if check_url_in_archive(url):
-        print("   [EXISTS] Found in archive. Updating CSV state.")
-        update_csv_state(url, True)
-        return
+    with metrics.phase("check"):
+        exists = url in index or check_url_in_archive(url)
+    if exists is None:
+        # Unknown is not "missing": posting now could duplicate a crawl
+        print("   [SKIP] Could not verify; will retry on the next run.")
+        return False
+    if exists:
+        print("   [EXISTS] Found in archive. Updating state.")
+        mark_confirmed(url, store, catalog, index.get(url))
+        return False
+    if dedupe and is_duplicate_document(url, store, catalog):
+        return False
 
     # 3. Prepare Payload
     payload = {
@@ -108,60 +177,188 @@ def ingest_report(row):
         "metadata_time": row.get('iso_format_date'),
         "metadata_language": "english",
         "metadata_format": "wacz",
-        "metadata_subjects": [SUBJECT_ID],
+        "metadata_subjects": [resolve_subject_id()],
         "is_private": False
     }
 
     # 4. POST Request
     print("   [POST] Sending data to archive...")
     try:
-        response = requests.post(API_BASE_URL, json=payload, headers=get_headers())
-        response.raise_for_status()
+        with metrics.phase("post"):
+            get_client().create_accession(payload)
         print("   [POST] Success.")
     except requests.RequestException as e:
         print(f"   [ERROR] Failed to post {url}: {e}")
-        if 'response' in locals() and response.text:
-            print(f"   [ERROR DETAILS] {response.text}")
-        return # Move to next? Or stop? User said "upload one... shouldn't go to next... until previous one has shown up". So we return and let the loop retry or just stop. Here I'll return, and next run will retry.
+        if e.response is not None and e.response.text:
+            print(f"   [ERROR DETAILS] {e.response.text}")
+        if may_have_acted(e):
+            # Posting again could duplicate the crawl; poll for it instead
+            print("   [UNKNOWN] The crawl may have been submitted. Polling for it before any new POST.")
+            store.set_status(url, UNKNOWN, error=str(e))
+            return True
+        store.set_status(url, FAILED, error=str(e))
+        return False # Failed rows are retried on the next run.
 
-    # 5. Blocking Poll
-    print("   [POLL] Waiting for record to appear in archive...")
-    attempt = 1
-    while True:
-        if check_url_in_archive(url):
-            print(f"   [SUCCESS] Record confirmed in archive after {attempt} attempts.")
-            break
-        
-        print(f"   [POLL] Attempt {attempt}: Not found yet. Waiting 5s...")
-        time.sleep(5)
-        attempt += 1
-        
-        # Safety break to prevent infinite loops if something is really wrong (e.g. 5 minutes)
-        if attempt > 60:
-            print("   [TIMEOUT] Waited too long. Moving on, but NOT marking as ingested.")
-            return
+    # Record the submission before polling so a crash mid-poll never re-posts.
+    store.set_status(url, POSTED)
+    return True
+
+def ingest_report(row, index, store, catalog, dedupe=True):
+    url = row['url']
+    print(f"\nProcessing: {url}")
+
+    if store.status(url) in (POSTED, UNKNOWN):
+        print("   [RESUME] Crawl already submitted.")
+        wait_for_confirmation(url, store, catalog)
+        return
+
+    # Blocking poll: don't move on until this crawl has shown up
+    if submit_report(row, index, store, catalog, dedupe):
+        wait_for_confirmation(url, store, catalog)
+
+def ingest_pipelined(rows, index, store, catalog, max_in_flight, dedupe=True):
+    """
+    Keeps up to `max_in_flight` crawls running at once. Instead of polling each
+    URL, one fetch of the subject's accession listing confirms whichever
+    in-flight URLs have appeared; fetches happen when the next crawl is due
+    to be checked. A URL is only marked confirmed once it shows up; crawls
+    that exceed their timeout stay 'posted' (or 'unknown') for the next run.
+    """
+    schedule = PollSchedule(store.crawl_times())
+    queue = deque(rows)
+    in_flight = {}
+    confirmed = timed_out = 0
+
+    def track(url):
+        size = stored_size(catalog, url)
+        posted_at = store.posted_at(url) or time.time()
+        in_flight[url] = {
+            "posted_at": posted_at,
+            "due": time.time() + schedule.first_wait(size, time.time() - posted_at),
+            "timeout": schedule.timeout(size),
+            "attempt": 0,
+        }
+
+    for url in store.in_flight():
+        track(url)
 
-    # 6. Update State
-    update_csv_state(url, True)
-    print("   [DONE] CSV updated.")
+    while queue or in_flight:
+        while queue and len(in_flight) < max_in_flight:
+            row = queue.popleft()
+            print(f"\nProcessing: {row['url']}")
+            if submit_report(row, index, store, catalog, dedupe):
+                track(row['url'])
+
+        if not in_flight:
+            continue
+
+        with metrics.phase("poll"):
+            time.sleep(max(0.0, min(crawl["due"] for crawl in in_flight.values()) - time.time()))
+            try:
+                archived = ArchiveIndex.fetch()
+            except requests.RequestException as e:
+                print(f"   [!] Poll failed: {e}")
+                archived = ArchiveIndex()
+
+        now = time.time()
+        for url, crawl in list(in_flight.items()):
+            if url in archived:
+                record_crawl_time(url, store, catalog)
+                mark_confirmed(url, store, catalog, archived.get(url))
+                index.add(archived.get(url))
+                del in_flight[url]
+                confirmed += 1
+            elif now - crawl["posted_at"] > crawl["timeout"]:
+                print(f"   [TIMEOUT] {url} not confirmed. NOT marking as ingested.")
+                give_up_unknown(url, store)
+                del in_flight[url]
+                timed_out += 1
+            elif schedule.is_due(crawl["due"], now):
+                crawl["attempt"] += 1
+                remaining = crawl["posted_at"] + crawl["timeout"] - now
+                crawl["due"] = now + min(schedule.next_wait(crawl["attempt"]), remaining)
+
+        if confirmed:
+            schedule = PollSchedule(store.crawl_times())
+        print(f"[PROGRESS] confirmed={confirmed} in_flight={len(in_flight)} queued={len(queue)} timed_out={timed_out}")
+
+def ingest_all(rows, todo, index, store, catalog, args):
+    if args.in_flight > 0:
+        ingest_pipelined([row for row in rows if row['url'] in todo], index, store, catalog, args.in_flight,
+                         dedupe=not args.skip_dedupe)
+        return
+
+    # Crawls submitted by a previous (possibly crashed) run only need polling.
+    in_flight = store.in_flight()
+    if in_flight:
+        print(f"Resuming {len(in_flight)} in-flight crawl(s)...")
+        for url in in_flight:
+            print(f"\nResuming: {url}")
+            wait_for_confirmation(url, store, catalog)
+
+    for row in rows:
+        if row['url'] in todo:
+            ingest_report(row, index, store, catalog, dedupe=not args.skip_dedupe)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ingest the clean Yale reports into the Sudan Digital Archive.")
+    parser.add_argument(
+        "--in-flight", type=int, default=0,
+        help="Pipeline mode: keep up to N crawls running and confirm them together. Default is one at a time.",
+    )
+    parser.add_argument("--skip-link-check", action="store_true", help="Don't check document URLs before submitting crawls.")
+    parser.add_argument("--skip-dedupe", action="store_true", help="Don't hash documents to catch republished duplicates.")
+    parser.add_argument("--reports", default=REPORTS_FILE, help="Report table (.parquet), or an old clean reports CSV.")
+    return parser.parse_args()
+
+def finish(store, catalog, reports_file):
+    """
+    Prints the final state and carries confirmed reports over to the catalog
+    (including any a crashed run confirmed but never saved) and the report table.
+    """
+    for url in store.urls_with_status(CONFIRMED):
+        if not catalog.is_archived(url):
+            catalog.upsert(url, status=ARCHIVED)
+    save_catalog(catalog, force=True)
+    marked = report_table.mark_ingested(store.urls_with_status(CONFIRMED, SKIPPED), reports_file)
+    if marked:
+        print(f"Marked {marked} report(s) as ingested in {reports_file}.")
+    print(f"\nState: {store.counts()}")
+    store.close()
 
 def main():
+    args = parse_args()
     if not API_KEY:
         print("Error: SDA_API_KEY environment variable not set.")
         return
 
-    initialize_csv()
-    
-    # Read fresh after initialization
-    with open(CSV_FILE, mode='r', encoding='utf-8') as f:
-        # Load all rows into memory to iterate safely
-        # Note: We read from file inside update_csv_state, so we can iterate this list 
-        # but we must be careful that 'update_csv_state' is atomic and doesn't break this loop's data references.
-        # Since we just need the URL and data from this snapshot, it's fine.
-        rows = list(csv.DictReader(f))
-    
-    for row in rows:
-        ingest_report(row)
+    # Only reports still to do are read; the filter is pushed down to the Parquet scan
+    with metrics.phase("select"):
+        rows = report_table.to_rows(report_table.pending_reports(args.reports))
+
+    store = StateStore()
+    store.seed(rows)
+
+    catalog = load_catalog()
+    with metrics.phase("index"):
+        index = load_archive_index()
+    todo = set(store.urls_with_status(PENDING, FAILED))
+
+    # A dead document link would only produce an empty crawl
+    if not args.skip_link_check:
+        with metrics.phase("link_check"):
+            broken = find_broken_links([row['url'] for row in rows if row['url'] in todo])
+        for url, entry in broken.items():
+            print(f"[BROKEN] {url} returned {entry['status']}; not submitting a crawl.")
+            store.set_status(url, FAILED, error=f"broken link ({entry['status']})")
+            todo.discard(url)
+
+    # Whatever happens, confirmed reports reach the catalog and the report table
+    try:
+        ingest_all(rows, todo, index, store, catalog, args)
+    finally:
+        finish(store, catalog, args.reports)
 
 if __name__ == "__main__":
-    main()
+    with metrics.run("ingest_reports"):
+        main()
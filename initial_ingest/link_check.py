@@ -0,0 +1,148 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+import metrics
+import report_table
+from file_lock import write_json
+from http_session import make_session
+from rate_limit import TokenBucket
+
+# Checks that report document URLs still resolve without downloading them:
+# a HEAD request, or a one-byte Range GET for servers that refuse HEAD.
+REPORTS_FILE = report_table.REPORTS_FILE
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache"
+CACHE_FILE = CACHE_DIR / "link_status.json"
+
+DEFAULT_WORKERS = 16
+DEFAULT_RATE = 20 # requests per second across all workers
+DEFAULT_MAX_AGE = 24 * 60 * 60 # seconds before a cached result is rechecked
+TIMEOUT = (5, 15) # connect, read
+
+ALIVE_STATUSES = {200, 206, 304}
+# Answers from servers that don't support HEAD for this resource
+HEAD_UNSUPPORTED = {403, 405, 501}
+
+def load_link_cache(path=CACHE_FILE):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_link_cache(cache, path=CACHE_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_json(path, cache)
+
+def check_link(session, url, etag=None):
+    """
+    Returns a cache entry {ok, status, etag, method, checked_at}. ok is None
+    when the server could not be reached, so an outage is not a broken link.
+    """
+    headers = {"If-None-Match": etag} if etag else {}
+    entry = {"checked_at": time.time(), "etag": etag}
+    try:
+        response = session.head(url, headers=headers, allow_redirects=True, timeout=TIMEOUT)
+        method = "HEAD"
+        if response.status_code in HEAD_UNSUPPORTED:
+            # stream=True so only the headers and at most one byte are read
+            response = session.get(url, headers=dict(headers, Range="bytes=0-0"),
+                                   allow_redirects=True, stream=True, timeout=TIMEOUT)
+            response.close()
+            method = "RANGE"
+    except requests.RequestException as e:
+        entry.update(ok=None, status=None, method=None, error=str(e))
+        return entry
+
+    entry.update(
+        ok=response.status_code in ALIVE_STATUSES,
+        status=response.status_code,
+        method=method,
+        etag=response.headers.get("ETag") or etag,
+    )
+    return entry
+
+def check_links(urls, cache=None, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, max_age=DEFAULT_MAX_AGE):
+    """
+    Yields (url, entry) in input order. Entries younger than `max_age` come
+    straight from `cache`; the rest are checked concurrently, revalidating
+    with the stored ETag, and written back into `cache`.
+    """
+    cache = {} if cache is None else cache
+    now = time.time()
+    stale = [
+        url for url in dict.fromkeys(urls)
+        if url not in cache or cache[url].get("ok") is None or now - cache[url].get("checked_at", 0) >= max_age
+    ]
+    bucket = TokenBucket(rate)
+    session = make_session(workers)
+
+    def check(url):
+        bucket.acquire()
+        return check_link(session, url, (cache.get(url) or {}).get("etag"))
+
+    with session, ThreadPoolExecutor(max_workers=workers) as executor:
+        for url, entry in zip(stale, executor.map(check, stale)):
+            cache[url] = entry
+
+    for url in urls:
+        yield url, cache[url]
+
+def find_broken_links(urls, **kwargs):
+    """
+    Checks `urls` through the on-disk cache and returns {url: entry} for the
+    ones that answered with a dead status.
+    """
+    cache = load_link_cache()
+    broken = {url: entry for url, entry in check_links(urls, cache, **kwargs) if entry["ok"] is False}
+    save_link_cache(cache)
+    return broken
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check that every report document URL in the report table is reachable.")
+    parser.add_argument("--reports", "--csv", default=REPORTS_FILE, help="Report table (.parquet), or a reports CSV.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Maximum concurrent requests.")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Maximum requests per second.")
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE, help="Seconds before a cached result is rechecked.")
+    parser.add_argument("--recheck", action="store_true", help="Ignore cached results.")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    urls = report_table.relevant_urls(args.reports)
+
+    cache = load_link_cache()
+    max_age = 0 if args.recheck else args.max_age
+    counts = {"ok": 0, "broken": 0, "error": 0}
+    start = time.perf_counter()
+
+    with metrics.phase("check"):
+        results = list(check_links(urls, cache, args.workers, args.rate, max_age))
+    for url, entry in results:
+        if entry["ok"]:
+            counts["ok"] += 1
+        elif entry["ok"] is False:
+            print(f"[BROKEN] {entry['status']} {url}")
+            counts["broken"] += 1
+        else:
+            print(f"[ERROR] {url}: {entry.get('error')}")
+            counts["error"] += 1
+    save_link_cache(cache)
+
+    print("\n--- Summary ---")
+    print(f"Checked {len(urls)} links in {time.perf_counter() - start:.1f}s")
+    print(f"Reachable: {counts['ok']}")
+    print(f"Broken: {counts['broken']}")
+    if counts["error"]:
+        print(f"Could not check (network errors): {counts['error']}")
+    sys.exit(1 if counts["broken"] else 0)
+
+if __name__ == "__main__":
+    with metrics.run("link_check"):
+        main()
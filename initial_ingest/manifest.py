@@ -0,0 +1,177 @@
+import argparse
+import getpass
+import json
+import secrets
+import socket
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from catalog import ARCHIVED, SKIPPED, document_id, load_catalog
+from file_lock import LockTimeout, locked, write_json
+
+# Safe updates to yale_manifest.json when more than one check runs at once
+# (a cron check and an interactive session, say). Every change is a
+# read-modify-write under the manifest's lock, written atomically, and:
+#
+#   claim     takes a report before any crawl work starts. It fails if the
+#             report is already the manifest's last ingested URL, archived or
+#             skipped in the catalog, or claimed by another run, so only one
+#             run ever submits its crawl.
+#   complete  advances last_ingested_url as a compare-and-swap: with --expect
+#             it only moves from the URL the caller read at the start, so a
+#             slower run never winds the manifest back past a newer report.
+#   release   gives a claim up (the crawl failed, or the run decided to stop).
+#
+# release and complete need the claim's token while the claim is live, so a
+# run can never drop a claim another run holds.
+#
+# Claims live under "claims" in the manifest, keyed by document id, and lapse
+# after CLAIM_TTL so a run that died mid-crawl doesn't block the report for
+# good. The key is dropped when no claims are left.
+MANIFEST_FILE = Path(__file__).resolve().parent.parent / "yale_manifest.json"
+CLAIM_TTL = 2 * 60 * 60 # seconds; a crawl and its confirmation take minutes
+
+def default_owner():
+    return f"{getpass.getuser()}@{socket.gethostname()}"
+
+def load_manifest(path=MANIFEST_FILE):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def update_manifest(change, path=MANIFEST_FILE):
+    """
+    Calls `change(manifest)` with the current manifest while holding its lock
+    and writes the manifest back if `change` altered it. Returns what
+    `change` returns.
+    """
+    with locked(path):
+        manifest = load_manifest(path)
+        before = json.dumps(manifest, sort_keys=True)
+        result = change(manifest)
+        if not manifest.get("claims"):
+            manifest.pop("claims", None)
+        if json.dumps(manifest, sort_keys=True) != before:
+            write_json(path, manifest, sort_keys=False)
+    return result
+
+def active_claims(manifest, now=None):
+    now = now or datetime.now(timezone.utc)
+    return {
+        doc_id: claim for doc_id, claim in manifest.get("claims", {}).items()
+        if datetime.fromisoformat(claim["expires_at"]) > now
+    }
+
+def claim(url, owner=None, ttl=CLAIM_TTL, path=MANIFEST_FILE, catalog_path=None):
+    """
+    Claims `url` for this run. Returns (True, claim) with the claim's token, or
+    (False, {"reason": ...}) when another run or an earlier one already has it.
+    """
+    doc_id = document_id(url)
+    catalog = load_catalog(catalog_path) if catalog_path else load_catalog()
+
+    def take(manifest):
+        if manifest.get("last_ingested_url") and document_id(manifest["last_ingested_url"]) == doc_id:
+            return False, {"reason": "already the last ingested report"}
+        if catalog.status(url) in (ARCHIVED, SKIPPED):
+            return False, {"reason": f"already {catalog.status(url)} in the catalog"}
+        now = datetime.now(timezone.utc)
+        held = active_claims(manifest, now).get(doc_id)
+        if held:
+            return False, {"reason": "claimed by another run", "claim": held}
+        new_claim = {
+            "url": url,
+            "owner": owner or default_owner(),
+            "token": secrets.token_hex(8),
+            "claimed_at": now.isoformat(timespec="seconds"),
+            "expires_at": (now + timedelta(seconds=ttl)).isoformat(timespec="seconds"),
+        }
+        # Lapsed claims go too, so the manifest doesn't collect them
+        manifest["claims"] = {**active_claims(manifest, now), doc_id: new_claim}
+        return True, new_claim
+
+    return update_manifest(take, path)
+
+def drop_claim(manifest, url, token=None):
+    """
+    Removes the claim on `url`. A live claim only goes with its own token;
+    without one, only a lapsed claim (or none) can be dropped. Returns False
+    if a live claim was left in place.
+    """
+    doc_id = document_id(url)
+    held = active_claims(manifest).get(doc_id)
+    if held and held["token"] != token:
+        return False
+    manifest.get("claims", {}).pop(doc_id, None)
+    return True
+
+def release(url, token=None, path=MANIFEST_FILE):
+    return update_manifest(lambda manifest: drop_claim(manifest, url, token), path)
+
+def complete(url, expect=None, token=None, checked=None, path=MANIFEST_FILE):
+    """
+    Records `url` as the last ingested report and drops its claim. With
+    `expect`, only if last_ingested_url is still `expect` (compare-and-swap).
+    Returns (updated, last_ingested_url now in the manifest).
+    """
+    def swap(manifest):
+        if not drop_claim(manifest, url, token):
+            return False, manifest.get("last_ingested_url")
+        if expect is not None and manifest.get("last_ingested_url") != expect:
+            return False, manifest.get("last_ingested_url")
+        manifest["last_ingested_url"] = url
+        manifest["last_check_date"] = checked or date.today().isoformat()
+        return True, url
+
+    return update_manifest(swap, path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Claim reports and advance yale_manifest.json safely across concurrent runs.")
+    parser.add_argument("--manifest", default=MANIFEST_FILE, help="Manifest file (default: yale_manifest.json).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("show", help="Print the manifest, with only unexpired claims.")
+
+    claim_cmd = subparsers.add_parser("claim", help="Claim a report before crawling it; exits 1 if it is taken or done.")
+    claim_cmd.add_argument("url")
+    claim_cmd.add_argument("--owner", help="Who holds the claim (default: user@host).")
+    claim_cmd.add_argument("--ttl", type=float, default=CLAIM_TTL, help="Seconds before the claim lapses.")
+
+    release_cmd = subparsers.add_parser("release", help="Give up a claim without advancing the manifest.")
+    release_cmd.add_argument("url")
+    release_cmd.add_argument("--token", help="The token printed by claim; needed while the claim is live.")
+
+    complete_cmd = subparsers.add_parser("complete", help="Set last_ingested_url and drop the claim; exits 1 if --expect no longer holds.")
+    complete_cmd.add_argument("url")
+    complete_cmd.add_argument("--expect", help="The last_ingested_url read before starting; the update only happens if it is unchanged.")
+    complete_cmd.add_argument("--token", help="The token printed by claim; without it, fails if any run holds a live claim.")
+    complete_cmd.add_argument("--date", help="last_check_date (default: today).")
+
+    args = parser.parse_args()
+    try:
+        if args.command == "show":
+            manifest = load_manifest(args.manifest)
+            if "claims" in manifest:
+                manifest["claims"] = active_claims(manifest)
+            print(json.dumps(manifest, indent=2, ensure_ascii=False))
+        elif args.command == "claim":
+            claimed, details = claim(args.url, args.owner, args.ttl, args.manifest)
+            print(json.dumps({"claimed": claimed, **details}, indent=2, ensure_ascii=False))
+            sys.exit(0 if claimed else 1)
+        elif args.command == "release":
+            released = release(args.url, args.token, args.manifest)
+            print(json.dumps({"released": released}))
+            sys.exit(0 if released else 1)
+        elif args.command == "complete":
+            updated, last_url = complete(args.url, args.expect, args.token, args.date, args.manifest)
+            print(json.dumps({"updated": updated, "last_ingested_url": last_url}, indent=2))
+            sys.exit(0 if updated else 1)
+    except LockTimeout as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main()
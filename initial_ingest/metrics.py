@@ -0,0 +1,244 @@
+import contextlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Per-phase timing and HTTP request metrics shared by the ingest scripts.
+# Wrap a script's main() in run("<script>"), mark phases with phase("<name>"),
+# and every request made through an instrumented session (see response_hook)
+# is counted against the phase that is running. At exit one JSON line is
+# appended to runs.jsonl and <script>.prom is rewritten in Prometheus text
+# format (node_exporter textfile style), both under METRICS_DIR.
+#
+# INGEST_METRICS=0 turns writing off; INGEST_PROFILE=1 also runs the script
+# under cProfile and saves <script>.prof next to the metrics. INGEST_HTTP
+# switches the run to recording or replaying HTTP (see http_cassette.py).
+METRICS_DIR = Path(os.environ.get("INGEST_METRICS_DIR") or Path(__file__).resolve().parent.parent / ".cache" / "metrics")
+RUNS_FILE = "runs.jsonl"
+
+# Prometheus-style latency buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+ID_SEGMENT = re.compile(r"^(\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{32,})$", re.IGNORECASE)
+# Document downloads (report.pdf, 12.docx): one series per host, not per file
+FILE_SEGMENT = re.compile(r"^[^.]+\.[A-Za-z0-9]{2,5}$")
+
+def collapse(segment):
+    if ID_SEGMENT.match(segment):
+        return ":id"
+    if FILE_SEGMENT.match(segment):
+        return ":file"
+    return segment
+
+def endpoint(method, url):
+    """'GET host/path' with ids, UUIDs and file names collapsed so they group."""
+    parts = urlsplit(url)
+    path = "/".join(collapse(segment) for segment in parts.path.split("/"))
+    return f"{method.upper()} {parts.netloc}{path}"
+
+class PhaseStats:
+    def __init__(self):
+        self.seconds = 0.0 # summed over threads, so it can exceed wall time
+        self.calls = 0
+        self.threads = set() # idents of the threads that entered the phase
+        self.requests = Counter() # (endpoint, status) -> count
+        self.retries = Counter() # endpoint -> count
+        self.latency = {} # endpoint -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, name, seconds):
+        histogram = self.latency.setdefault(name, [0] * (len(BUCKETS) + 2))
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram[i] += 1
+        histogram[len(BUCKETS)] += 1
+        histogram[-1] += seconds
+
+    def to_dict(self):
+        requests = {}
+        for (name, status), count in sorted(self.requests.items()):
+            requests.setdefault(name, {})[str(status)] = count
+        latency = {
+            name: {"count": h[len(BUCKETS)], "sum": round(h[-1], 6),
+                   "buckets": {str(bound): h[i] for i, bound in enumerate(BUCKETS)}}
+            for name, h in sorted(self.latency.items())
+        }
+        return {"seconds": round(self.seconds, 6), "calls": self.calls, "threads": len(self.threads), "requests": requests,
+                "retries": dict(self.retries), "latency": latency}
+
+class Metrics:
+    def __init__(self, script="unknown"):
+        self.script = script
+        self.started_at = time.time()
+        self.phases = {}
+        # Each thread has its own stack of running phases. A worker thread that
+        # entered none counts its requests against the main thread's phase,
+        # the one that started the pool.
+        self.main_stack = []
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def _stack(self):
+        if threading.current_thread() is threading.main_thread():
+            return self.main_stack
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    def _stats(self, name=None):
+        stack = self._stack() or self.main_stack
+        name = name or (stack[-1] if stack else "other")
+        return self.phases.setdefault(name, PhaseStats())
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Times the block as phase `name`. Phases may be entered many times
+        (e.g. once per report) and from several threads at once; time and
+        calls accumulate, so a phase run by N threads in parallel can report
+        up to N times its wall time.
+        """
+        stack = self._stack()
+        with self.lock:
+            self._stats(name).threads.add(threading.get_ident())
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self.lock:
+                stats = self.phases[name]
+                stats.seconds += elapsed
+                stats.calls += 1
+
+    def record_request(self, method, url, status, seconds):
+        name = endpoint(method, url)
+        with self.lock:
+            stats = self._stats()
+            stats.requests[name, status] += 1
+            stats.observe(name, seconds)
+
+    def record_retry(self, method, url):
+        with self.lock:
+            self._stats().retries[endpoint(method, url)] += 1
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "script": self.script,
+                "started_at": self.started_at,
+                "seconds": round(time.time() - self.started_at, 6),
+                "phases": {name: stats.to_dict() for name, stats in self.phases.items()},
+            }
+
+    def to_prometheus(self):
+        run = self.to_dict()
+        base = f'script="{self.script}"'
+        lines = [
+            "# HELP ingest_run_seconds Wall time of the last run.",
+            "# TYPE ingest_run_seconds gauge",
+            f"ingest_run_seconds{{{base}}} {run['seconds']}",
+            "# HELP ingest_run_timestamp_seconds Start time of the last run.",
+            "# TYPE ingest_run_timestamp_seconds gauge",
+            f"ingest_run_timestamp_seconds{{{base}}} {run['started_at']}",
+            "# HELP ingest_phase_seconds Time spent in each phase, summed over the threads that ran it.",
+            "# TYPE ingest_phase_seconds gauge",
+        ]
+        for name, stats in run["phases"].items():
+            lines.append(f'ingest_phase_seconds{{{base},phase="{name}"}} {stats["seconds"]}')
+        lines += ["# HELP ingest_phase_threads Threads that ran each phase.", "# TYPE ingest_phase_threads gauge"]
+        for name, stats in run["phases"].items():
+            lines.append(f'ingest_phase_threads{{{base},phase="{name}"}} {stats["threads"]}')
+        lines += ["# HELP ingest_requests_total HTTP requests by endpoint and status.", "# TYPE ingest_requests_total counter"]
+        for name, stats in run["phases"].items():
+            for url, statuses in stats["requests"].items():
+                for status, count in statuses.items():
+                    lines.append(f'ingest_requests_total{{{base},phase="{name}",endpoint="{url}",status="{status}"}} {count}')
+        lines += ["# HELP ingest_retries_total Retried HTTP requests by endpoint.", "# TYPE ingest_retries_total counter"]
+        for name, stats in run["phases"].items():
+            for url, count in stats["retries"].items():
+                lines.append(f'ingest_retries_total{{{base},phase="{name}",endpoint="{url}"}} {count}')
+        lines += ["# HELP ingest_request_duration_seconds HTTP request latency.", "# TYPE ingest_request_duration_seconds histogram"]
+        for name, stats in run["phases"].items():
+            for url, histogram in stats["latency"].items():
+                labels = f'{base},phase="{name}",endpoint="{url}"'
+                for bound, count in histogram["buckets"].items():
+                    lines.append(f'ingest_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'ingest_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram["count"]}')
+                lines.append(f'ingest_request_duration_seconds_sum{{{labels}}} {histogram["sum"]}')
+                lines.append(f'ingest_request_duration_seconds_count{{{labels}}} {histogram["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory=METRICS_DIR):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / RUNS_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.to_dict()) + "\n")
+        prom = directory / f"{self.script}.prom"
+        tmp = prom.with_suffix(".prom.tmp")
+        tmp.write_text(self.to_prometheus(), encoding='utf-8')
+        os.replace(tmp, prom)
+
+_metrics = Metrics()
+
+def get_metrics():
+    return _metrics
+
+def phase(name):
+    return _metrics.phase(name)
+
+def record_request(method, url, status, seconds):
+    _metrics.record_request(method, url, status, seconds)
+
+def record_retry(method, url):
+    _metrics.record_retry(method, url)
+
+def response_hook(response, *args, **kwargs):
+    """
+    requests response hook: pass as hooks={"response": response_hook} or add
+    to session.hooks["response"]. Latency is time to response headers.
+    """
+    record_request(response.request.method, response.url, response.status_code, response.elapsed.total_seconds())
+
+@contextlib.contextmanager
+def run(script):
+    """
+    Collects metrics for one script run and writes them on the way out,
+    including when the script exits through sys.exit or an exception.
+    """
+    global _metrics
+    _metrics = Metrics(script)
+    if os.environ.get("INGEST_HTTP"):
+        import http_cassette
+
+        http_cassette.install_from_env()
+    profiler = None
+    if os.environ.get("INGEST_PROFILE") == "1":
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield _metrics
+    finally:
+        if os.environ.get("INGEST_HTTP"):
+            import http_cassette
+
+            http_cassette.save()
+        if profiler is not None:
+            profiler.disable()
+            METRICS_DIR.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(METRICS_DIR / f"{script}.prof")
+            print(f"[METRICS] Profile written to {METRICS_DIR / f'{script}.prof'}", file=sys.stderr)
+        if os.environ.get("INGEST_METRICS", "1") != "0":
+            try:
+                _metrics.write()
+            except OSError as e:
+                print(f"[METRICS] Could not write metrics: {e}", file=sys.stderr)
@@ -2,17 +2,15 @@ import csv
 import time
 import json
 
-# URLs identified as already existing in the archive
-SKIPPED_URLS = {
-    "https://files-profile.medicine.yale.edu/documents/001a93f9-1c99-4437-a023-bac1294d3d0e",
-    "https://files-profile.medicine.yale.edu/documents/45e77af9-a3cb-4bae-9bc2-61efe1d1595f"
-}
+from catalog import load_catalog
 
 CSV_FILE = "clean_yhlr_reports.csv"
 API_ENDPOINT = "https://api.sudandigitalarchive.com/sda-api/api/v1/accessions"
 
 def mock_process_reports():
     print(f"Starting mock ingestion from {CSV_FILE}...")
+    # Reports the catalog marks as archived already exist in the archive
+    catalog = load_catalog()
     
     try:
         with open(CSV_FILE, mode='r', encoding='utf-8') as csvfile:
@@ -26,7 +24,7 @@ def mock_process_reports():
                 if not url:
                     continue
                     
-                if url in SKIPPED_URLS:
+                if catalog.is_archived(url):
                     print(f"[SKIP] URL already exists in archive: {url}")
                     skipped_count += 1
                     continue
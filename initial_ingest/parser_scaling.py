@@ -0,0 +1,232 @@
+import argparse
+import io
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+from report_parser import DEFAULT_PARSER, PARSERS, extract_reports
+from synthetic_page import MALFORMED_KINDS, generate_page
+
+# get_latest_yale_reports.py lives at the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import get_latest_yale_reports as yale
+
+# Complexity and memory regression check for both report parsers: the
+# BeautifulSoup extraction in report_parser.py and the streaming regex parser
+# in get_latest_yale_reports.py. Each runs on synthetic listing pages
+# (synthetic_page.py) from 10 to 100,000 reports, every measurement in its own
+# process so one page's garbage doesn't count against the next. Exits 1 if
+# time grows faster than linearly in the number of reports, if a parser goes
+# over its memory budget, or if it loses or misdates a well-formed report.
+#
+# Growth across the page can hide a regex that backtracks within one block,
+# since blocks are capped in size; so each kind of malformed block is also
+# timed on its own and may not cost much more per byte than well-formed ones.
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+CHECKED = ["report_parser", "get_latest_yale_reports"]
+
+# A page ten times bigger may take at most this many times ten as long
+GROWTH_TOLERANCE = 1.5
+# Below this a run is mostly timer noise and fixed costs, not growth
+MIN_SECONDS = 0.05
+# Small pages are parsed again until this much time is spent; the best run counts
+TARGET_SECONDS = 0.3
+MAX_RUNS = 20
+
+# A page of one kind of malformed block may cost at most this many times as
+# much per byte as a page of well-formed blocks
+KIND_TOLERANCE = 3
+KIND_PAGE_REPORTS = 200
+
+# Peak memory a parse may add, in MB, at any size. report_parser.py holds
+# the whole tree (about 8 KB per report); get_latest_yale_reports.py streams
+# and should stay flat however long the page is.
+MEMORY_BUDGET_MB = {"report_parser": 2048, "get_latest_yale_reports": 64}
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_mb()
+
+def reset_peak():
+    """Resets the kernel's peak-RSS mark where Linux allows it; elsewhere the peak so far stands."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+def peak_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def parse_scrape(data, parser):
+    for report in extract_reports(data.decode("utf-8"), parser):
+        yield report["url"], yale.to_iso_date(report["date"]) if report["date"] else ""
+
+def parse_latest(data, parser):
+    response = requests.Response()
+    response.raw = io.BytesIO(data)
+    response.encoding = "utf-8"
+    for block in yale.iter_report_blocks(response):
+        yield block["url"], block["date"]
+
+PARSE = {"report_parser": parse_scrape, "get_latest_yale_reports": parse_latest}
+
+def check(results, reports):
+    """
+    Consumes (url, date) pairs as the parser produces them, so a streaming
+    parser isn't charged for holding its output. Returns the problem counts.
+    """
+    expected = {report["url"]: report for report in reports}
+    counts = {"unknown": 0, "wrong_dates": 0}
+    for url, date in results:
+        report = expected.get(url)
+        if report is None:
+            counts["unknown"] += 1
+            continue
+        report["found"] = True
+        if report["malformed"] is None and date != report["date"]:
+            counts["wrong_dates"] += 1
+    counts["missing"] = sum(not report["found"] for report in reports)
+    return counts
+
+def measure(name, size, seed, parser):
+    """Parses one page in this process and returns its timings, peak memory and problem counts."""
+    parse = PARSE[name]
+    warm_up, _ = generate_page(10, seed)
+    for _ in parse(warm_up.encode("utf-8"), parser):
+        pass
+
+    html, reports = generate_page(size, seed)
+    data = html.encode("utf-8")
+    del html
+    for report in reports:
+        report["found"] = False # set now so checking allocates nothing per report
+
+    before = rss_mb()
+    reset_peak()
+    start = time.perf_counter()
+    counts = check(parse(data, parser), reports)
+    best = time.perf_counter() - start
+    peak = max(peak_mb() - before, 0.0)
+
+    runs, spent = 1, best
+    while spent < TARGET_SECONDS and runs < MAX_RUNS:
+        start = time.perf_counter()
+        for _ in parse(data, parser):
+            pass
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        runs += 1
+    return {"parser": name, "reports": size, "bytes": len(data), "seconds": best, "runs": runs, "peak_mb": peak, **counts}
+
+def best_seconds(parse, data, parser, runs=3):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        for _ in parse(data, parser):
+            pass
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def kind_failures(names, seed, parser, tolerance):
+    """Times pages made of a single kind of malformed block against a well-formed page."""
+    pages = {None: generate_page(KIND_PAGE_REPORTS, seed, malformed=0)[0]}
+    for kind in MALFORMED_KINDS:
+        pages[kind] = generate_page(KIND_PAGE_REPORTS, seed, malformed=1, kinds=[kind])[0]
+
+    failures = []
+    print(f"\nus/KB by kind of block ({KIND_PAGE_REPORTS} reports each)")
+    print(f"{'kind':<16} {'KB':>6}" + "".join(f"{name:>26}" for name in names))
+    costs = {}
+    for kind, html in pages.items():
+        data = html.encode("utf-8")
+        for name in names:
+            costs[name, kind] = best_seconds(PARSE[name], data, parser) / len(data) * 1024 * 1e6
+        print(f"{kind or 'well formed':<16} {len(data) / 1024:>6.0f}" + "".join(f"{costs[name, kind]:>26.1f}" for name in names))
+        for name in names:
+            ratio = costs[name, kind] / costs[name, None]
+            if kind and ratio > tolerance:
+                failures.append(f"{name}: {kind} blocks cost {ratio:.1f}x as much per byte as well-formed ones (allowed {tolerance}x)")
+    return failures
+
+def run_measurement(name, size, seed, parser):
+    command = [sys.executable, __file__, "--measure", name, str(size), "--seed", str(seed), "--parser", parser]
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def growth_failures(rows, tolerance):
+    failures = []
+    for prev, row in zip(rows, rows[1:]):
+        if prev["seconds"] < MIN_SECONDS:
+            continue
+        size_ratio = row["reports"] / prev["reports"]
+        time_ratio = row["seconds"] / prev["seconds"]
+        if time_ratio > size_ratio * tolerance:
+            failures.append(
+                f"{row['parser']}: {prev['reports']} -> {row['reports']} reports took {time_ratio:.1f}x as long "
+                f"(linear would be {size_ratio:.0f}x, allowed {size_ratio * tolerance:.0f}x)"
+            )
+    return failures
+
+def run_suite(names, sizes, seed, parser, tolerance, budgets):
+    failures = []
+    for name in names:
+        print(f"\n{name} (budget {budgets[name]} MB)")
+        print(f"{'reports':>8} {'bytes':>12} {'seconds':>9} {'us/report':>10} {'runs':>5} {'peak MB':>8}  problems")
+        rows = []
+        for size in sizes:
+            row = run_measurement(name, size, seed, parser)
+            rows.append(row)
+            problems = {key: row[key] for key in ("missing", "unknown", "wrong_dates") if row[key]}
+            print(f"{size:>8} {row['bytes']:>12} {row['seconds']:>9.3f} {row['seconds'] / size * 1e6:>10.1f} "
+                  f"{row['runs']:>5} {row['peak_mb']:>8.1f}  {problems or '-'}")
+            if problems:
+                failures.append(f"{name}: {size} reports: {problems}")
+            if row["peak_mb"] > budgets[name]:
+                failures.append(f"{name}: {size} reports peaked at {row['peak_mb']:.0f} MB, over the {budgets[name]} MB budget")
+        failures.extend(growth_failures(rows, tolerance))
+    return failures + kind_failures(names, seed, parser, KIND_TOLERANCE)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the report parsers scale linearly and stay within memory budgets on synthetic pages.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Numbers of reports per page.")
+    parser.add_argument("--only", choices=CHECKED, action="append", help="Check just this parser (repeatable).")
+    parser.add_argument("--parser", choices=PARSERS, default=DEFAULT_PARSER, help="BeautifulSoup backend for report_parser.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--growth-tolerance", type=float, default=GROWTH_TOLERANCE,
+                        help="How many times worse than linear growth between two sizes may be.")
+    parser.add_argument("--memory-budget", type=float, help="MB budget for every parser instead of the defaults.")
+    parser.add_argument("--measure", nargs=2, metavar=("PARSER", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        name, size = args.measure
+        print(json.dumps(measure(name, int(size), args.seed, args.parser)))
+        return
+
+    budgets = {name: args.memory_budget or MEMORY_BUDGET_MB[name] for name in CHECKED}
+    failures = run_suite(args.only or CHECKED, sorted(args.sizes), args.seed, args.parser, args.growth_tolerance, budgets)
+    print()
+    for failure in failures:
+        print(f"[FAIL] {failure}")
+    if failures:
+        sys.exit(1)
+    print("[OK] Both parsers scale linearly and stay within their memory budgets.")
+
+if __name__ == "__main__":
+    main()
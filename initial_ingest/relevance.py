@@ -0,0 +1,149 @@
+import argparse
+import json
+import sys
+
+import polars as pl
+
+# Decides whether a report is about Sudan from its title and citation, in
+# place of a hand-kept list of non-Sudan titles. Every spelling of every term
+# below becomes one pattern of a single Aho-Corasick automaton (Polars'
+# str.extract_many), so a whole column of titles is matched in one pass over
+# the text, whatever the number of terms. Text is lower-cased, punctuation
+# becomes spaces (another automaton) and text and patterns are padded with
+# spaces, so "El-Fasher’s" matches "el fasher" and "saf" doesn't match "safe".
+#
+# Other conflicts the lab covers weigh against. A report with no terms either
+# way (a citation naming only a mosque, say) scores 0 and is kept, since the
+# listing is overwhelmingly about Sudan; clean_reports.py prints those.
+
+# canonical term: (weight, spellings). Arabic script and the common English
+# transliterations are listed as spellings of the same term.
+TERMS = {
+    # Country and the warring parties
+    "Sudan": (2, ["sudan", "sudanese", "السودان", "سودان"]),
+    "RSF": (2, ["rsf", "rapid support forces", "rapid support force", "الدعم السريع", "quwat al daam al sari"]),
+    "SAF": (2, ["saf", "sudanese armed forces", "sudan armed forces", "القوات المسلحة السودانية"]),
+    "Janjaweed": (2, ["janjaweed", "janjawid", "janjawiid", "الجنجويد", "جنجويد"]),
+    # Regions and states
+    "Darfur": (1, ["darfur", "دارفور"]),
+    "Kordofan": (1, ["kordofan", "kurdufan", "كردفان"]),
+    # Bare "الجزيرة" is also Al Jazeera, so only the state's full name counts
+    "Gezira": (1, ["gezira", "al gezira", "al jazirah", "aj jazirah", "ولاية الجزيرة"]),
+    "Blue Nile": (1, ["blue nile", "النيل الأزرق"]),
+    "White Nile": (1, ["white nile", "النيل الأبيض"]),
+    "Kassala": (1, ["kassala", "كسلا"]),
+    "Gedaref": (1, ["gedaref", "al qadarif", "القضارف"]),
+    "Sennar": (1, ["sennar", "sinnar", "سنار"]),
+    # Cities, towns and camps
+    "Khartoum": (1, ["khartoum", "al khartoum", "el khartoum", "الخرطوم"]),
+    "Omdurman": (1, ["omdurman", "umm durman", "أم درمان", "ام درمان"]),
+    "Bahri": (1, ["bahri", "khartoum north", "بحري"]),
+    "El Fasher": (1, ["el fasher", "al fasher", "el fashir", "al fashir", "fasher", "fashir", "الفاشر"]),
+    "Nyala": (1, ["nyala", "نيالا"]),
+    "El Geneina": (1, ["geneina", "el geneina", "al geneina", "al junaynah", "الجنينة"]),
+    "El Obeid": (1, ["el obeid", "al obeid", "al ubayyid", "el ubeid", "الأبيض", "الابيض"]),
+    "En Nahud": (1, ["en nahud", "al nuhud", "el nahud", "النهود"]),
+    "Ed Daein": (1, ["ed daein", "al duayn", "ad duayn", "الضعين"]),
+    "Zalingei": (1, ["zalingei", "زالنجي"]),
+    "Kadugli": (1, ["kadugli", "كادقلي"]),
+    "Dilling": (1, ["dilling", "الدلنج"]),
+    "Babanusa": (1, ["babanusa", "بابنوسة"]),
+    "Wad Madani": (1, ["wad madani", "wad medani", "ود مدني"]),
+    "Port Sudan": (1, ["port sudan", "بورتسودان", "بورت سودان"]),
+    "Kutum": (1, ["kutum", "كتم"]),
+    "Mellit": (1, ["mellit", "مليط"]),
+    "Kabkabiya": (1, ["kabkabiya", "كبكابية"]),
+    "Tawila": (1, ["tawila", "طويلة"]),
+    "Malha": (1, ["el malha", "al malha", "المالحة"]),
+    "Zamzam": (1, ["zamzam", "zam zam", "زمزم"]),
+    "Abu Shouk": (1, ["abu shouk", "abu shok", "أبو شوك", "ابو شوك"]),
+    "Kalma": (1, ["kalma camp", "kalma idp camp"]),
+    # Elsewhere
+    "Ukraine": (-2, ["ukraine", "ukrainian", "kyiv", "donetsk", "luhansk", "kharkiv", "mariupol", "crimea"]),
+    "Russia": (-1, ["russia", "russian", "russian federation"]),
+    "Gaza": (-2, ["gaza", "west bank", "غزة"]),
+    "Israel": (-1, ["israel", "israeli"]),
+    "Syria": (-2, ["syria", "syrian", "سوريا"]),
+    "Yemen": (-2, ["yemen", "yemeni", "اليمن"]),
+    "Ethiopia": (-2, ["ethiopia", "ethiopian", "tigray"]),
+    "Myanmar": (-2, ["myanmar", "burma", "rohingya"]),
+}
+# Terms in the title count this many times over terms only in the citation
+TITLE_WEIGHT = 2
+MIN_SCORE = 0
+
+# Columns classify() adds
+COLUMNS = ["relevance_score", "relevance_terms", "sudan_relevant"]
+
+SPELLINGS = {spelling: term for term, (_, spellings) in TERMS.items() for spelling in spellings}
+WEIGHTS = {term: weight for term, (weight, _) in TERMS.items()}
+PATTERNS = [f" {spelling} " for spelling in SPELLINGS]
+PUNCTUATION = list("-‐–—'’‘`\"“”,،.:;!?()[]{}&/\\|_*#+=<>…")
+
+# Passed as single list-typed literals: a plain Python list is broadcast per
+# row, and Polars then builds the automaton for every row instead of once.
+PATTERN_LIST = pl.lit(PATTERNS, dtype=pl.List(pl.String))
+PUNCTUATION_LIST = pl.lit(PUNCTUATION, dtype=pl.List(pl.String))
+SPACES_LIST = pl.lit([" "] * len(PUNCTUATION), dtype=pl.List(pl.String))
+
+def normalized(column):
+    """Lower-cased, punctuation to spaces, padded: ' el fasher s population '."""
+    text = pl.col(column).fill_null("").str.to_lowercase().str.replace_many(PUNCTUATION_LIST, SPACES_LIST)
+    return pl.concat_str([pl.lit(" "), text, pl.lit(" ")])
+
+def matched_terms(column):
+    """Expression: the canonical terms found in `column`, each once, in order of appearance."""
+    matches = normalized(column).str.extract_many(PATTERN_LIST, overlapping=True)
+    return matches.list.eval(
+        pl.element().str.strip_chars(" ").replace_strict(SPELLINGS, return_dtype=pl.String)
+    ).list.unique(maintain_order=True)
+
+def term_weight(terms):
+    return terms.list.eval(pl.element().replace_strict(WEIGHTS, return_dtype=pl.Int64)).list.sum()
+
+def classify(df, title="title", description="description"):
+    """
+    Adds relevance_score, relevance_terms (title terms first) and
+    sudan_relevant to a DataFrame or LazyFrame. Runs lazily either way, where
+    Polars shares and parallelises the steps.
+    """
+    scored = (
+        df.lazy().with_columns(_title_terms=matched_terms(title), _description_terms=matched_terms(description))
+        .with_columns(_description_terms=pl.col("_description_terms").list.set_difference("_title_terms"))
+        .with_columns(
+            relevance_score=term_weight(pl.col("_title_terms")) * TITLE_WEIGHT + term_weight(pl.col("_description_terms")),
+            relevance_terms=pl.concat_list("_title_terms", "_description_terms"),
+        )
+        .with_columns(sudan_relevant=pl.col("relevance_score") >= MIN_SCORE)
+        .drop("_title_terms", "_description_terms")
+    )
+    return scored.collect() if isinstance(df, pl.DataFrame) else scored
+
+def classify_text(title, description=""):
+    """(score, matched terms) for a single report."""
+    row = classify(pl.DataFrame({"title": [title], "description": [description]})).row(0, named=True)
+    return row["relevance_score"], row["relevance_terms"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Score how Sudan-relevant each report in a reports CSV, or one report, is.")
+    parser.add_argument("csv_file", nargs="?")
+    parser.add_argument("--title", help="Score one report instead: prints JSON, exits 1 if it is not about Sudan.")
+    parser.add_argument("--description", default="", help="Citation or other text for --title.")
+    parser.add_argument("--irrelevant", action="store_true", help="Only print reports below the relevance threshold.")
+    args = parser.parse_args()
+
+    if args.title is not None:
+        score, terms = classify_text(args.title, args.description)
+        print(json.dumps({"score": score, "terms": terms, "sudan_relevant": score >= MIN_SCORE}, ensure_ascii=False))
+        sys.exit(0 if score >= MIN_SCORE else 1)
+    if not args.csv_file:
+        parser.error("a CSV file or --title is required")
+
+    df = classify(pl.read_csv(args.csv_file, infer_schema=False))
+    if args.irrelevant:
+        df = df.filter(~pl.col("sudan_relevant"))
+    for row in df.iter_rows(named=True):
+        print(f"{row['relevance_score']:>4}  {', '.join(row['relevance_terms']) or '-':<40}  {row['title']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import polars as pl
+
+# Date handling shared by clean_reports.py and report_table.py: the two ways
+# the Yale listing writes dates, and the ISO text the ingest payloads use.
+
+# Tried in order; the first that parses wins.
+DATE_FORMATS = [
+    "%B %d, %Y", # January 16, 2026
+    "%d %B %Y",  # 23 May 2024
+]
+# Same text as the notebook's datetime.isoformat(), e.g. 2026-01-16T00:00:00
+ISO_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+def parse_dates(column="date", formats=DATE_FORMATS):
+    """
+    Expression parsing `column` with each format and keeping the first
+    non-null result. Unparseable dates come out null rather than raising.
+    """
+    raw = pl.col(column).str.strip_chars()
+    return pl.coalesce([raw.str.strptime(pl.Datetime, fmt, strict=False) for fmt in formats])
@@ -0,0 +1,160 @@
+import importlib.util
+import re
+
+from bs4 import BeautifulSoup, Tag
+
+# Parsing of the Yale reports listing: the page layouts a report can appear
+# in and the walk that finds each report's link, title, citation and date.
+# Shared by scrape_reports.py and crawl_frontier.py.
+URL = "https://medicine.yale.edu/lab/khoshnood/publications/reports/"
+
+# Any BeautifulSoup tree builder works; lxml is several times faster than the
+# built-in html.parser. Neither lxml nor html5lib is a dependency, so they are
+# only offered when installed.
+PARSERS = ["html.parser"] + [name for name in ("lxml", "html5lib") if importlib.util.find_spec(name)]
+DEFAULT_PARSER = "html.parser"
+
+# The user specifically wants links to files-profile.medicine.yale.edu/documents/
+TARGET_PATTERN = re.compile(r"https://files-profile\.medicine\.yale\.edu/documents/")
+
+MONTHS = "January|February|March|April|May|June|July|August|September|October|November|December"
+# "Month DD, YYYY"
+MONTH_DAY_YEAR = re.compile(rf"(?:{MONTHS})\s+\d{{1,2}},\s+\d{{4}}")
+# "DD Month YYYY" (e.g. 23 May 2024)
+DAY_MONTH_YEAR = re.compile(rf"\d{{1,2}}\s+(?:{MONTHS})\s+\d{{4}}")
+# Title often has date in parens at the end: "Title (Month DD, YYYY)"
+DATE_IN_PARENS = re.compile(rf"\((?:{MONTHS})\s+\d{{1,2}},\s+\d{{4}}\)")
+
+class LinkWithDescription:
+    """
+    The 'link-list' style (most common 2025/2024 reports).
+    Structure A:
+    <div class="document-link-with-description">
+      <a ...><span class="link__label">Title (Date)</span></a>
+      <div class="document-link-with-description__description">...</div>
+    </div>
+    Structure B:
+    <div class="link-with-description">
+      <a ...><span class="link__label">Title (Date)</span></a>
+      <span class="link-with-description__description">...</span>
+    </div>
+    """
+    name = "link-with-description"
+    container_classes = ["document-link-with-description", "link-with-description"]
+    description_classes = ["document-link-with-description__description", "link-with-description__description"]
+
+    def extract(self, link, container, title):
+        description = ""
+        date_str = ""
+
+        date_match = DATE_IN_PARENS.search(title)
+        if date_match:
+            date_str = date_match.group(0).strip("()")
+            # Remove the date from the title if it was found at the end
+            if title.strip().endswith(date_match.group(0)):
+                title = title[:date_match.start()].strip()
+
+        desc_elem = container.find(class_=self.description_classes)
+        if desc_elem:
+            description = desc_elem.get_text(" ", strip=True)
+
+        return title, description, date_str
+
+class ContentListItem:
+    """
+    The 'multi-column-list' style (e.g. 2026 reports top of page).
+    Structure:
+    <div class="content-list-item__content">
+      <h4><a ...>Title</a></h4>
+      <p><strong>Situation Report | Date</strong></p>
+      <p>Citation...</p>
+    </div>
+    """
+    name = "content-list-item"
+    container_classes = ["content-list-item__content"]
+
+    def extract(self, link, container, title):
+        description = ""
+        date_str = ""
+
+        # format: "Situation Report | January 16, 2026"
+        strong_tag = container.find("strong")
+        if strong_tag:
+            date_match = MONTH_DAY_YEAR.search(strong_tag.get_text(strip=True))
+            if date_match:
+                date_str = date_match.group(0)
+
+        # It's usually the p tag starting with "Citation"
+        for p in container.find_all("p"):
+            text = p.get_text(" ", strip=True)
+            if text.startswith("Citation"):
+                description = text
+                break
+
+        return title, description, date_str
+
+# Earlier strategies win when a link sits inside containers of several layouts.
+STRATEGIES = [LinkWithDescription(), ContentListItem()]
+
+def build_class_lookup(strategies):
+    lookup = {}
+    for priority, strategy in enumerate(strategies):
+        for cls in strategy.container_classes:
+            lookup.setdefault(cls, (priority, strategy))
+    return lookup
+
+def iter_report_links(soup, strategies=STRATEGIES):
+    """
+    Walks the tree once, in document order, yielding (link, container, strategy)
+    for every report link. The innermost matching container is carried down
+    the walk instead of searching upwards from each link with find_parent.
+    """
+    lookup = build_class_lookup(strategies)
+    stack = [(soup, None, None, len(strategies))]
+    while stack:
+        node, container, strategy, priority = stack.pop()
+
+        for cls in node.get("class") or ():
+            match = lookup.get(cls)
+            if match and match[0] <= priority:
+                priority, strategy = match
+                container = node
+
+        if node.name == "a" and TARGET_PATTERN.search(node.get("href") or ""):
+            yield node, container, strategy
+
+        stack.extend(
+            (child, container, strategy, priority)
+            for child in reversed(node.contents) if isinstance(child, Tag)
+        )
+
+def extract_date_from_description(description):
+    # Fallback date extraction if empty and citation contains date
+    date_match = MONTH_DAY_YEAR.search(description) or DAY_MONTH_YEAR.search(description)
+    return date_match.group(0) if date_match else ""
+
+def extract_reports(html, parser=DEFAULT_PARSER, strategies=STRATEGIES):
+    return reports_from_soup(BeautifulSoup(html, parser), strategies)
+
+def reports_from_soup(soup, strategies=STRATEGIES):
+    reports = []
+
+    for link, container, strategy in iter_report_links(soup, strategies):
+        title = link.get_text(" ", strip=True)
+        description = ""
+        date_str = ""
+
+        if strategy is not None:
+            title, description, date_str = strategy.extract(link, container, title)
+
+        if not date_str and description:
+            date_str = extract_date_from_description(description)
+
+        reports.append({
+            "url": link["href"],
+            "title": title,
+            "description": description,
+            "date": date_str
+        })
+
+    return reports
@@ -0,0 +1,156 @@
+import argparse
+import os
+from pathlib import Path
+
+import polars as pl
+
+import relevance
+from report_dates import ISO_FORMAT, parse_dates
+from subjects import LANG, YALE_SUBJECT
+
+# The report list as one typed Parquet table instead of the CSV chain
+# (yale_reports.csv -> clean_yhlr_reports.csv with 'True'/'False' strings).
+# Non-Sudan reports stay in the table flagged by sudan_relevant, with the
+# relevance score and matched terms from relevance.py, and rows are
+# sorted so the pending ones sit together: a scan filtered on
+# "not ingested and Sudan-relevant" reads only the row groups that can match,
+# using the Parquet min/max statistics, however much history piles up.
+REPORTS_FILE = "yhlr_reports.parquet"
+ROW_GROUP_SIZE = 4096
+
+SCHEMA = {
+    "url": pl.String,
+    "title": pl.String,
+    "description": pl.String,
+    "date": pl.Date,
+    "language": pl.Categorical,
+    "subject": pl.Categorical,
+    "relevance_score": pl.Int64,
+    "relevance_terms": pl.List(pl.String),
+    "sudan_relevant": pl.Boolean,
+    "ingested": pl.Boolean,
+}
+# Row order on disk; pending rows (ingested=False, sudan_relevant=True) first
+SORT_BY = ["ingested", "sudan_relevant", "date"]
+SORT_DESCENDING = [False, True, True]
+
+PENDING = ~pl.col("ingested") & pl.col("sudan_relevant")
+
+def from_csv_frame(df):
+    """
+    Types a scraped or cleaned reports CSV (all columns read as strings):
+    dates parsed once, ingested 'True'/'False' turned into a bool, relevance
+    scored from the title and citation.
+    """
+    columns = df.collect_schema().names()
+    date = parse_dates("date")
+    if "iso_format_date" in columns:
+        date = pl.coalesce([pl.col("iso_format_date").str.strptime(pl.Datetime, ISO_FORMAT, strict=False), date])
+    typed = df.select(
+        pl.col("url"),
+        pl.col("title").fill_null(""),
+        (pl.col("description") if "description" in columns else pl.lit(None, pl.String)).fill_null(""),
+        date.dt.date().alias("date"),
+        pl.lit(LANG).cast(pl.Categorical).alias("language"),
+        pl.lit(YALE_SUBJECT).cast(pl.Categorical).alias("subject"),
+        ((pl.col("ingested") == "True") if "ingested" in columns else pl.lit(False)).fill_null(False).alias("ingested"),
+    ).filter(pl.col("url").is_not_null() & (pl.col("url") != ""))
+    return relevance.classify(typed)
+
+def scan_reports(path=REPORTS_FILE):
+    """
+    LazyFrame over the report table. A .csv path (the old clean or scraped
+    CSV) is typed on the fly, so every script accepts either.
+    """
+    path = Path(path)
+    if path.suffix == ".csv":
+        return from_csv_frame(pl.scan_csv(path, infer_schema=False))
+    return pl.scan_parquet(path)
+
+def write_reports(df, path=REPORTS_FILE):
+    """Writes the table atomically, sorted so pending rows share row groups."""
+    path = Path(path)
+    df = df.select([pl.col(name).cast(dtype) for name, dtype in SCHEMA.items()])
+    df = df.unique("url", keep="first", maintain_order=True).sort(SORT_BY, descending=SORT_DESCENDING, nulls_last=True)
+    tmp = path.with_name(path.name + ".tmp")
+    df.write_parquet(tmp, statistics=True, row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp, path)
+    return df
+
+def merge_reports(df, path=REPORTS_FILE):
+    """
+    Writes `df` (freshly scraped and typed) as the table, keeping the ingested
+    flag of reports the existing table already has, and any reports that
+    dropped off the listing. Those are rescored, so relevance stays in step
+    with the current terms.
+    """
+    path = Path(path)
+    if path.exists():
+        existing = pl.read_parquet(path)
+        existing = relevance.classify(existing.drop(relevance.COLUMNS, strict=False))
+        ingested = existing.filter(pl.col("ingested")).get_column("url")
+        df = df.with_columns(ingested=pl.col("ingested") | pl.col("url").is_in(ingested.implode()))
+        df = pl.concat([df, existing.filter(~pl.col("url").is_in(df.get_column("url").implode()))], how="vertical_relaxed")
+    return write_reports(df, path)
+
+def pending_reports(path=REPORTS_FILE, columns=None):
+    """Reports not yet ingested and about Sudan, newest first, as a DataFrame."""
+    scan = scan_reports(path).filter(PENDING)
+    if columns:
+        scan = scan.select(columns)
+    return scan.collect()
+
+def relevant_urls(path=REPORTS_FILE):
+    return scan_reports(path).filter(pl.col("sudan_relevant")).select("url").collect().get_column("url").to_list()
+
+def to_rows(df):
+    """Row dicts in the shape the ingest code used to get from the clean CSV."""
+    return df.with_columns(
+        iso_format_date=pl.col("date").cast(pl.Datetime).dt.strftime(ISO_FORMAT),
+    ).to_dicts()
+
+def mark_ingested(urls, path=REPORTS_FILE):
+    """
+    Sets ingested for `urls` and rewrites the table. Returns how many rows
+    changed; CSV inputs are left alone (0).
+    """
+    path = Path(path)
+    urls = list(urls)
+    if path.suffix != ".parquet" or not urls or not path.exists():
+        return 0
+    df = pl.read_parquet(path)
+    hit = ~pl.col("ingested") & pl.col("url").is_in(urls)
+    changed = df.select(hit.sum()).item()
+    if changed:
+        write_reports(df.with_columns(ingested=pl.col("ingested") | hit), path)
+    return changed
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the typed Parquet report table.")
+    parser.add_argument("--reports", default=REPORTS_FILE, help="Report table (.parquet, or a reports CSV to read).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_cmd = subparsers.add_parser("import-csv", help="Merge a scraped or clean reports CSV into the table.")
+    import_cmd.add_argument("csv_file")
+
+    subparsers.add_parser("pending", help="Print URLs not yet ingested and about Sudan.")
+    subparsers.add_parser("stats", help="Print row counts by ingested and relevance.")
+
+    mark = subparsers.add_parser("mark-ingested", help="Mark URLs as ingested.")
+    mark.add_argument("urls", nargs="+")
+
+    args = parser.parse_args()
+    if args.command == "import-csv":
+        df = merge_reports(from_csv_frame(pl.read_csv(args.csv_file, infer_schema=False)), args.reports)
+        print(f"Wrote {len(df)} reports to {args.reports} ({df.filter(PENDING).height} pending).")
+    elif args.command == "pending":
+        for url in pending_reports(args.reports, ["url"]).get_column("url"):
+            print(url)
+    elif args.command == "stats":
+        counts = scan_reports(args.reports).group_by("sudan_relevant", "ingested").len().sort("sudan_relevant", "ingested").collect()
+        print(counts)
+    elif args.command == "mark-ingested":
+        print(f"Marked {mark_ingested(args.urls, args.reports)} report(s) as ingested.")
+
+if __name__ == "__main__":
+    main()
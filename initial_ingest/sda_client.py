@@ -0,0 +1,263 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+API_ROOT = os.environ.get("SDA_API_URL", "https://api.sudandigitalarchive.com/sda-api/api/v1")
+API_KEY = os.environ.get("SDA_API_KEY")
+
+CONNECT_TIMEOUT = 5 # seconds
+READ_TIMEOUT = 30 # seconds
+TOTAL_TIMEOUT = 120 # seconds across all retries of one call
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5 # seconds, doubled per attempt
+BACKOFF_MAX = 30 # seconds
+POOL_SIZE = 16
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class SdaApiError(requests.RequestException):
+    """
+    The API could not be reached or kept failing after retries. Distinct from
+    an empty result: callers must not read this as "not in the archive".
+    """
+
+class CircuitOpenError(SdaApiError):
+    """Raised without a request while the circuit breaker is open."""
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failed calls (each call counts once,
+    after its retries) and rejects calls for `cooldown` seconds, then lets a
+    single trial call through (half-open).
+    """
+
+    def __init__(self, threshold=5, cooldown=30):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raises CircuitOpenError while open. Returns True if this call is the half-open trial."""
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            if time.monotonic() - self.opened_at < self.cooldown or self._trial_running:
+                raise CircuitOpenError("SDA API circuit breaker is open; not sending request.")
+            self._trial_running = True
+            return True
+
+    def end_trial(self):
+        """Lets another trial through after one that ended without a recorded result."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+def may_have_acted(error):
+    """
+    Whether the server may have acted on a request that raised `error`. Only a
+    connect timeout, an open circuit breaker and a 4xx (including 429) mean it
+    certainly did not; a dropped connection, a read timeout or a 5xx leave the
+    outcome unknown.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    cause = error.__cause__ if isinstance(error, SdaApiError) and error.__cause__ else error
+    if isinstance(cause, requests.ConnectTimeout):
+        return False
+    response = getattr(cause, "response", None)
+    return response is None or response.status_code >= 500
+
+def retry_after_seconds(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class SdaClient:
+    """
+    Keep-alive session for the Sudan Digital Archive API with per-call and
+    overall timeouts, retries with exponential backoff and full jitter
+    (honoring Retry-After), and a circuit breaker shared by all threads.
+    """
+
+    def __init__(self, base_url=API_ROOT, api_key=API_KEY, connect_timeout=CONNECT_TIMEOUT,
+                 read_timeout=READ_TIMEOUT, total_timeout=TOTAL_TIMEOUT, max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, breaker=None, pool_size=POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.total_timeout = total_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.retries = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.hooks["response"].append(metrics.response_hook)
+        self.session.headers["Content-Type"] = "application/json"
+        if api_key:
+            self.session.headers["x-api-key"] = api_key
+
+    def close(self):
+        self.session.close()
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request(self, method, path, idempotent=None, **kwargs):
+        """
+        Sends one API call, retrying transient failures. Non-idempotent calls
+        (POST) are only retried when the server clearly did not act on them:
+        a connect timeout or a 429.
+        """
+        if idempotent is None:
+            idempotent = method.upper() in ("GET", "HEAD", "PUT", "DELETE")
+        url = path if path.startswith("http") else f"{self.base_url}/{path.lstrip('/')}"
+        deadline = time.monotonic() + self.total_timeout
+        attempt = 0
+
+        trial = self.breaker.before_call()
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                timeout = (min(self.connect_timeout, remaining), min(self.read_timeout, remaining))
+                wait = None
+                start = time.perf_counter()
+                try:
+                    response = self.session.request(method, url, timeout=timeout, **kwargs)
+                except requests.ConnectTimeout as e:
+                    error = e
+                    metrics.record_request(method, url, "error", time.perf_counter() - start)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = e
+                    metrics.record_request(method, url, "error", time.perf_counter() - start)
+                    if not idempotent:
+                        self.breaker.record_failure()
+                        raise SdaApiError(f"{method} {url} failed: {e}") from e
+                except requests.RequestException as e:
+                    self.breaker.record_failure()
+                    raise SdaApiError(f"{method} {url} failed: {e}") from e
+                else:
+                    if response.status_code not in RETRY_STATUSES or (not idempotent and response.status_code != 429):
+                        if response.status_code >= 500:
+                            self.breaker.record_failure()
+                        else:
+                            self.breaker.record_success()
+                        return response
+                    error = requests.HTTPError(f"{response.status_code} from {method} {url}", response=response)
+                    wait = retry_after_seconds(response)
+
+                attempt += 1
+                wait = self._backoff(attempt) if wait is None else wait
+                if attempt > self.max_retries or time.monotonic() + wait >= deadline:
+                    self.breaker.record_failure()
+                    raise SdaApiError(f"{method} {url} failed after {attempt} attempt(s): {error}") from error
+                self.retries += 1
+                metrics.record_retry(method, url)
+                time.sleep(wait)
+        finally:
+            # A trial cut short (an exception from a hook, KeyboardInterrupt)
+            # must not leave the breaker rejecting every later call
+            if trial:
+                self.breaker.end_trial()
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def get_json(self, path, **kwargs):
+        response = self.get(path, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    # --- accessions --------------------------------------------------------
+
+    def list_accessions(self, **params):
+        return self.get_json("accessions", params=params)
+
+    def find_accessions(self, url):
+        """
+        Returns the accessions whose url_filter matches `url` ([] if none).
+        Raises SdaApiError or HTTPError if the API could not answer.
+        """
+        data = self.list_accessions(url_filter=url)
+        # Access 'items' if present, otherwise assume list
+        return data.get('items', data) if isinstance(data, dict) else data
+
+    def url_exists(self, url):
+        return len(self.find_accessions(url)) > 0
+
+    def create_accession(self, payload):
+        response = self.post("accessions", json=payload)
+        response.raise_for_status()
+        return response
+
+    def update_accession(self, accession_id, payload):
+        response = self.put(f"accessions/{accession_id}", json=payload)
+        response.raise_for_status()
+        return response
+
+    # --- metadata subjects -------------------------------------------------
+
+    def search_subjects(self, query_term, lang):
+        return self.get_json("metadata-subjects", params={"query_term": query_term, "lang": lang}).get('items', [])
+
+    def create_subject(self, subject, lang):
+        response = self.post("metadata-subjects", json={"metadata_subject": subject, "lang": lang})
+        response.raise_for_status()
+        return response.json()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Returns the process-wide client so every caller shares one connection pool."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SdaClient()
+        return _client
+
+def set_client(client):
+    global _client
+    with _client_lock:
+        _client = client
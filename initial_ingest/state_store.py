@@ -0,0 +1,117 @@
+import sqlite3
+import time
+
+STATE_DB = "ingest_state.db"
+
+# Lifecycle of a report: pending -> posted (crawl submitted, not yet visible)
+# -> confirmed (seen in the archive). A failed POST goes to failed and is
+# retried on the next run like a pending one. A POST that failed after the
+# request may have reached the server (dropped connection, read timeout, 5xx)
+# goes to unknown: it is polled like a posted crawl, across runs, and only if it
+# still hasn't shown up a day later does it become failed and get posted again. A report whose document is
+# already archived under another URL is skipped and never posted.
+PENDING = "pending"
+POSTED = "posted"
+UNKNOWN = "unknown"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+class StateStore:
+    """
+    Per-report ingest state in SQLite (WAL mode). Each status change is a
+    single-row upsert committed immediately, so a crash loses at most the
+    transition in progress and a restart knows exactly which crawls are in flight.
+    """
+
+    def __init__(self, path=STATE_DB):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS reports (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                posted_at REAL,
+                updated_at REAL NOT NULL,
+                error TEXT
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS reports_status ON reports (status)")
+        # How long confirmed crawls took, to time the polling of new ones
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_times (
+                url TEXT PRIMARY KEY,
+                seconds REAL NOT NULL,
+                size INTEGER,
+                recorded_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def seed(self, rows):
+        """
+        Registers every report row as pending unless it is already tracked. Rows
+        marked ingested (True, or 'True' from the old CSV workflow) start out confirmed.
+        """
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO reports (url, status, updated_at) VALUES (?, ?, ?)",
+                [
+                    (row['url'], CONFIRMED if row.get('ingested') in (True, 'True') else PENDING, now)
+                    for row in rows if row.get('url')
+                ],
+            )
+
+    def status(self, url):
+        row = self.conn.execute("SELECT status FROM reports WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def set_status(self, url, status, error=None):
+        now = time.time()
+        posted_at = now if status in (POSTED, UNKNOWN) else None
+        with self.conn:
+            self.conn.execute("""
+                INSERT INTO reports (url, status, posted_at, updated_at, error) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    status = excluded.status,
+                    posted_at = COALESCE(excluded.posted_at, reports.posted_at),
+                    updated_at = excluded.updated_at,
+                    error = excluded.error
+            """, (url, status, posted_at, now, error))
+
+    def posted_at(self, url):
+        row = self.conn.execute("SELECT posted_at FROM reports WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def record_crawl_time(self, url, seconds, size=None):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO crawl_times (url, seconds, size, recorded_at) VALUES (?, ?, ?, ?)",
+                (url, seconds, size, time.time()),
+            )
+
+    def crawl_times(self, limit=200):
+        """The most recent (seconds, size) crawl durations."""
+        rows = self.conn.execute(
+            "SELECT seconds, size FROM crawl_times ORDER BY recorded_at DESC LIMIT ?", (limit,)
+        )
+        return rows.fetchall()
+
+    def urls_with_status(self, *statuses):
+        placeholders = ", ".join("?" for _ in statuses)
+        rows = self.conn.execute(
+            f"SELECT url FROM reports WHERE status IN ({placeholders}) ORDER BY updated_at", statuses
+        )
+        return [row[0] for row in rows]
+
+    def in_flight(self):
+        """Crawls that were, or may have been, submitted and still need polling."""
+        return self.urls_with_status(POSTED, UNKNOWN)
+
+    def counts(self):
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM reports GROUP BY status"))
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+from file_lock import write_json
+from sda_client import get_client
+
+# Metadata subject ids by (name, language), cached on disk so scripts don't
+# search /metadata-subjects on every run.
+YALE_SUBJECT = "Yale Humanitarian Research Lab"
+LANG = "english"
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache"
+CACHE_FILE = CACHE_DIR / "subjects.json"
+DEFAULT_TTL = 7 * 24 * 60 * 60 # seconds; subject ids practically never change
+
+class SubjectNotFound(LookupError):
+    pass
+
+class SubjectResolver:
+    """
+    Resolves subject names to ids through a TTL'd JSON cache. Concurrent
+    lookups of the same subject share one API request (single-flight), and an
+    expired entry is still used if the API can't be reached.
+    """
+
+    def __init__(self, path=CACHE_FILE, ttl=DEFAULT_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_json(self.path, self.entries)
+
+    def resolve(self, subject=YALE_SUBJECT, lang=LANG, create=False, refresh=False):
+        key = f"{lang}:{subject}"
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and not refresh and time.time() - entry["resolved_at"] < self.ttl:
+                return entry["id"]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            subject_id = self._lookup(subject, lang, create)
+        except SubjectNotFound as e:
+            future.set_exception(e)
+            raise
+        except Exception as e:
+            if entry:
+                print(f"[SUBJECT] Lookup failed, using cached id {entry['id']} for '{subject}': {e}")
+                future.set_result(entry["id"])
+                return entry["id"]
+            future.set_exception(e)
+            raise
+        else:
+            with self._lock:
+                self.entries[key] = {"id": subject_id, "resolved_at": time.time()}
+                self._save()
+            future.set_result(subject_id)
+            return subject_id
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def _lookup(self, subject, lang, create):
+        client = get_client()
+        for item in client.search_subjects(subject, lang):
+            if item.get('subject') == subject:
+                return item['id']
+        if not create:
+            raise SubjectNotFound(f"Subject '{subject}' ({lang}) not found; run get_subject_id.py to create it.")
+        print(f"[SUBJECT] Creating subject '{subject}' ({lang})...")
+        return client.create_subject(subject, lang)['id']
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+def get_resolver():
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = SubjectResolver()
+        return _resolver
+
+def set_resolver(resolver):
+    global _resolver
+    with _resolver_lock:
+        _resolver = resolver
+
+def resolve_subject_id(subject=YALE_SUBJECT, lang=LANG, create=False):
+    return get_resolver().resolve(subject, lang, create)
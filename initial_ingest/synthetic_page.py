@@ -0,0 +1,150 @@
+import argparse
+import random
+import sys
+import uuid
+from datetime import date, timedelta
+from html import escape
+
+# Builds Yale reports listing pages of any size, for timing the parsers far
+# beyond the few dozen reports the live page has. Reports come newest first,
+# in runs of the three layouts the page uses (content-list items, and the
+# two link-with-description variants), with dates written both ways
+# ("January 16, 2026" and "16 January 2026") and a share of malformed blocks
+# of the kinds that would make a careless regex backtrack or a parser lose
+# its place. Seeded, so a size always gives the same page.
+DOCUMENTS_URL = "https://files-profile.medicine.yale.edu/documents/"
+NEWEST = date(2026, 1, 16)
+DEFAULT_MALFORMED = 0.1
+
+LAYOUTS = ["content-list-item", "link-with-description", "document-link-with-description"]
+MALFORMED_KINDS = [
+    "no_citation",      # no citation or date anywhere in the block
+    "no_date",          # a citation with no date in it
+    "unclosed_quote",   # the title's opening quote is never closed
+    "bad_date",         # a month that doesn't exist, or a day past its end
+    "number_soup",      # kilobytes of numbers and date-like fragments
+    "stray_citations",  # "Citation |" over and over with no quoted title
+    "extra_links",      # "Copy Link" and download anchors to the same document
+]
+
+PREFIXES = ["Atrocity Alert:", "Situation Report:", "Special Report:", "Flash Update:", ""]
+EVENTS = [
+    "Confirmed Civilian Displacement", "Recent Bombardment", "Ongoing Body Disposal", "Mass Killings",
+    "Destruction of Markets", "Fires Along the Berm", "Attacks on Health Facilities", "Siege Conditions",
+    "Vehicle Movements", "Looting of Aid Warehouses",
+]
+PLACES = [
+    "El Obeid", "El-Fasher", "Zamzam IDP Camp", "Nyala", "Khartoum", "Omdurman", "Wad Madani", "Abu Shouk",
+    "Tawila", "Kadugli", "En Nahud", "Babanusa", "Geneina", "Kutum",
+]
+AUTHORS = [
+    "Andersen, Daniel", "Rebecca Chausse", "Caitlin N. Howarth", "Omer Ismail", "Olivia Mooney",
+    "Danielle N. Poole", "Nathaniel A. Raymond", "Kaveh Khoshnood",
+]
+LAB = "Humanitarian Research Lab at Yale School of Public Health: New Haven."
+
+def month_day_year(day):
+    return f"{day:%B} {day.day}, {day.year}"
+
+def day_month_year(day):
+    return f"{day.day} {day:%B} {day.year}"
+
+def report_title(rng):
+    event = rng.choice(EVENTS)
+    if rng.random() < 0.3:
+        event += f" & {rng.choice(EVENTS)}"
+    return f"{rng.choice(PREFIXES)} {event} in {rng.choice(PLACES)}".strip()
+
+def citation(rng, title, day, kind):
+    authors = ", ".join(rng.sample(AUTHORS, rng.randint(2, 5))) + " et al."
+    cited_date = day_month_year(day) if rng.random() < 0.8 else month_day_year(day)
+    if kind == "no_date":
+        return f"Citation | {authors} “{title}.” Situation Report. {LAB}"
+    if kind == "unclosed_quote":
+        return f"Citation | {authors} “{title}. {cited_date}. {LAB}"
+    if kind == "bad_date":
+        cited_date = rng.choice([f"{day.day} Smarch {day.year}", f"February 30, {day.year}", f"31 Juneteenth {day.year}"])
+    elif kind == "number_soup":
+        soup = " ".join(f"{rng.randint(0, 99)} ab {rng.randint(1000, 9999)}" for _ in range(300))
+        return f"Citation | {authors} No. {soup} “{title}.” {cited_date}. {LAB}"
+    elif kind == "stray_citations":
+        return f"{'Citation | ' * 200}{authors} {title}, {cited_date}. {LAB}"
+    return f"Citation | {authors} “{title}.” {cited_date}. Situation Report, No. {rng.randint(1, 99)}. {LAB}"
+
+def report_block(rng, layout, url, title, day, kind):
+    href = escape(url)
+    label_date = "" if kind in ("no_citation", "no_date") else f" ({month_day_year(day)})"
+    if kind == "bad_date":
+        label_date = ""
+    cite = "" if kind == "no_citation" else escape(citation(rng, title, day, kind))
+    extra = ""
+    if kind == "extra_links":
+        extra = (f'<a class="copy-link" href="{href}">Copy Link</a>'
+                 f'<a class="download" href="{href}"><span><em>Download</em> PDF</span></a>')
+
+    if layout == "content-list-item":
+        strong = "" if kind in ("no_citation", "no_date", "bad_date") else f"<p><strong>Situation Report | {month_day_year(day)}</strong></p>"
+        body = f"<p>{cite}</p>" if cite else ""
+        return (f'<li class="content-list-item"><div class="content-list-item__content"><h4><a href="{href}">{escape(title)}</a></h4>'
+                f"{strong}{body}{extra}</div></li>")
+    label = f'<span class="link__label">{escape(title)}{label_date}</span>'
+    if layout == "link-with-description":
+        description = f'<span class="link-with-description__description">{cite}</span>' if cite else ""
+    else:
+        description = f'<div class="document-link-with-description__description">{cite}</div>' if cite else ""
+    return f'<div class="{layout}"><a class="link" href="{href}">{label}</a>{extra}{description}</div>'
+
+def section(layout, blocks):
+    if layout == "content-list-item":
+        return f'<section class="multi-column-list">\n<ul class="content-list">\n{chr(10).join(blocks)}\n</ul>\n</section>'
+    return f'<section class="link-list">\n{chr(10).join(blocks)}\n</section>'
+
+def generate_page(n, seed=0, malformed=DEFAULT_MALFORMED, kinds=MALFORMED_KINDS):
+    """
+    Returns (html, reports) for a listing of `n` reports, a `malformed` share
+    of them broken in one of `kinds`. `reports` holds the url, title, ISO
+    date, layout and malformed kind (None when well formed) of each report,
+    in page order.
+    """
+    rng = random.Random(seed)
+    reports = []
+    sections = []
+    day = NEWEST
+    while len(reports) < n:
+        layout = rng.choice(LAYOUTS)
+        blocks = []
+        for _ in range(min(rng.randint(1, 40), n - len(reports))):
+            kind = rng.choice(kinds) if rng.random() < malformed else None
+            url = DOCUMENTS_URL + str(uuid.UUID(int=rng.getrandbits(128)))
+            title = report_title(rng)
+            blocks.append(report_block(rng, layout, url, title, day, kind))
+            reports.append({"url": url, "title": title, "date": day.isoformat(), "layout": layout, "malformed": kind})
+            day -= timedelta(days=rng.choice([0, 1, 1, 2]))
+        sections.append(section(layout, blocks))
+
+    html = (
+        '<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n<title>Reports &lt; Khoshnood Lab</title>\n</head>\n<body>\n'
+        '<nav class="site-nav"><a href="/lab/khoshnood/">Home</a> <a href="/lab/khoshnood/publications/">Publications</a></nav>\n'
+        "<main>\n<h1>Reports</h1>\n" + "\n".join(sections) + "\n</main>\n"
+        "<footer><p>&copy; 2026 Yale School of Medicine</p></footer>\n</body>\n</html>\n"
+    )
+    return html, reports
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic Yale reports listing page with N reports.")
+    parser.add_argument("reports", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--malformed", type=float, default=DEFAULT_MALFORMED, help="Share of malformed report blocks.")
+    parser.add_argument("--kind", choices=MALFORMED_KINDS, action="append", help="Only break blocks this way (repeatable).")
+    parser.add_argument("-o", "--output", help="File to write (default: stdout).")
+    args = parser.parse_args()
+
+    html, _ = generate_page(args.reports, args.seed, args.malformed, args.kind or MALFORMED_KINDS)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(html)
+    else:
+        sys.stdout.write(html)
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,32 @@
-import csv
+import argparse
 import requests
-import time
-import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
-API_BASE_URL = "https://api.sudandigitalarchive.com/sda-api/api/v1/accessions"
-API_KEY = os.environ.get("SDA_API_KEY")
-SUBJECT_ID = 37  # Yale Humanitarian Research Lab
+from archive_index import iter_accessions, load_archive_index
+import metrics
+from catalog import load_catalog
+from rate_limit import TokenBucket
+from sda_client import API_KEY, get_client
+from subjects import resolve_subject_id
 
-def get_headers():
-    return {
-        "x-api-key": API_KEY,
-        "Content-Type": "application/json"
-    }
+# Every Yale report accession has a seed URL containing this
+YALE_DOCUMENTS_FILTER = "files-profile.medicine.yale.edu/documents/"
+
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 5  # PUTs per second across all workers
 
-def get_accession_by_url(url):
+def get_accession_by_url(url, index=None):
     """
     Returns the accession object if found, otherwise None.
+    Answers from the archive index when possible; only URLs the index doesn't
+    know about (e.g. accessions still missing our subject) hit the API.
     """
+    if index is not None and url in index:
+        return index.get(url)
     try:
-        response = requests.get(API_BASE_URL, params={"url_filter": url}, headers=get_headers())
-        response.raise_for_status()
-        data = response.json()
-        items = data.get('items', [])
-        for item in items:
+        for item in get_client().find_accessions(url):
             if item.get('seed_url') == url:
                 return item
         return None
@@ -31,62 +34,175 @@ def get_accession_by_url(url):
         print(f"   [!] Error fetching accession for {url}: {e}")
         return None
 
-def update_subjects_for_existing(accession):
-    accession_id = accession['id']
-    url = accession['seed_url']
-    
-    # Check if subject is already there
-    existing_subject_ids = accession.get('subjects_en_ids', []) or []
-    if SUBJECT_ID in existing_subject_ids:
-        print(f"   [OK] Subject {SUBJECT_ID} already present for accession {accession_id}.")
-        return True
-
-    print(f"   [UPDATE] Adding subject {SUBJECT_ID} to existing accession {accession_id} ({url})...")
-    
-    # Prepare update payload
+def build_update_payload(accession, **changes):
+    """
+    UpdateAccessionRequest built from the accession's current metadata, with
+    `changes` (metadata_* keys) applied on top. PUT replaces every field, so
+    anything we don't mean to change has to be sent back as it is.
+    """
     # UpdateAccessionRequest requires: metadata_language, metadata_title, metadata_time, metadata_subjects, is_private
-    new_subjects = list(set(existing_subject_ids + [SUBJECT_ID]))
-    
     payload = {
         "metadata_language": "english" if accession.get('has_english_metadata') else "arabic",
         "metadata_title": accession.get('title_en') or accession.get('title_ar') or "",
         "metadata_time": accession.get('dublin_metadata_date'),
-        "metadata_subjects": new_subjects,
+        "metadata_subjects": accession.get('subjects_en_ids', []) or [],
         "is_private": accession.get('is_private', False),
         "metadata_description": accession.get('description_en') or accession.get('description_ar')
     }
+    payload.update(changes)
+    return payload
 
+def put_accession(accession_id, payload):
     try:
-        update_url = f"{API_BASE_URL}/{accession_id}"
-        response = requests.put(update_url, json=payload, headers=get_headers())
-        response.raise_for_status()
+        get_client().update_accession(accession_id, payload)
         print(f"   [SUCCESS] Updated accession {accession_id}.")
         return True
     except requests.RequestException as e:
         print(f"   [ERROR] Failed to update accession {accession_id}: {e}")
-        if 'response' in locals() and response.text:
-            print(f"   [DETAILS] {response.text}")
+        if e.response is not None and e.response.text:
+            print(f"   [DETAILS] {e.response.text}")
         return False
 
-def main():
-    if not API_KEY:
-        print("Error: SDA_API_KEY not set.")
-        sys.exit(1)
+def update_subjects_for_existing(accession):
+    accession_id = accession['id']
+    url = accession['seed_url']
+
+    # Check if subject is already there
+    subject_id = resolve_subject_id()
+    existing_subject_ids = accession.get('subjects_en_ids', []) or []
+    if subject_id in existing_subject_ids:
+        print(f"   [OK] Subject {subject_id} already present for accession {accession_id}.")
+        return True
+
+    print(f"   [UPDATE] Adding subject {subject_id} to existing accession {accession_id} ({url})...")
+    new_subjects = list(set(existing_subject_ids + [subject_id]))
+    return put_accession(accession_id, build_update_payload(accession, metadata_subjects=new_subjects))
+
+def accession_changes(accession, entry):
+    """
+    Returns {field: (current, wanted)} for every metadata field where the
+    accession disagrees with its catalog entry. Fields the catalog doesn't
+    know are left alone.
+    """
+    changes = {}
+    subject_id = resolve_subject_id()
+    subjects = accession.get('subjects_en_ids', []) or []
+    if subject_id not in subjects:
+        changes["metadata_subjects"] = (subjects, sorted(set(subjects) | {subject_id}))
+    if entry is None:
+        return changes
+
+    title = (accession.get('title_en') or "").strip()
+    if entry.get("title") and entry["title"].strip() != title:
+        changes["metadata_title"] = (title, entry["title"].strip())
+
+    date = accession.get('dublin_metadata_date') or ""
+    if entry.get("date") and entry["date"] != date[:10]:
+        # Same "2026-01-16T00:00:00" text ingest_reports.py posts
+        changes["metadata_time"] = (date, datetime.fromisoformat(entry["date"]).isoformat())
+    return changes
+
+def has_metadata(entry):
+    """Whether the catalog entry has the title and date that drift is checked against."""
+    return bool(entry and entry.get("title") and entry.get("date"))
+
+def plan_reconciliation(accessions, catalog):
+    """
+    Yields (accession, changes) for every Yale accession that needs a PUT.
+    """
+    for accession in accessions:
+        url = accession.get('seed_url') or ""
+        if YALE_DOCUMENTS_FILTER not in url:
+            continue
+        changes = accession_changes(accession, catalog.get(url))
+        if changes:
+            yield accession, changes
+
+def print_diff(accession, changes):
+    print(f"[DIFF] accession {accession['id']} {accession['seed_url']}")
+    for field, (current, wanted) in changes.items():
+        print(f"    {field}: {current!r} -> {wanted!r}")
+
+def apply_reconciliation(plan, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE):
+    """
+    Sends the planned PUTs concurrently, at most `rate` per second. Returns
+    (updated, failed) counts.
+    """
+    bucket = TokenBucket(rate)
 
-    # 1. Get the 2 existing URLs we know about
-    existing_urls = [
-        "https://files-profile.medicine.yale.edu/documents/001a93f9-1c99-4437-a023-bac1294d3d0e",
-        "https://files-profile.medicine.yale.edu/documents/45e77af9-a3cb-4bae-9bc2-61efe1d1595f"
-    ]
+    def update(item):
+        accession, changes = item
+        payload = build_update_payload(accession, **{field: wanted for field, (_, wanted) in changes.items()})
+        bucket.acquire()
+        return put_accession(accession['id'], payload)
 
-    print("Updating existing records in archive...")
-    for url in existing_urls:
-        print(f"\nChecking {url}")
-        accession = get_accession_by_url(url)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(update, plan))
+    return results.count(True), results.count(False)
+
+def find_accessions_for_urls(urls):
+    index = load_archive_index()
+    accessions = []
+    for url in urls:
+        accession = get_accession_by_url(url, index)
         if accession:
-            update_subjects_for_existing(accession)
+            accessions.append(accession)
         else:
             print(f"   [!] Could not find accession for {url}")
+    return accessions
+
+def reconcile(catalog, accessions=None, dry_run=False, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE):
+    """
+    Fixes missing subjects and title/date drift from the catalog with only the
+    PUTs needed. Without `accessions`, pages through every accession with a
+    Yale document URL.
+    """
+    if accessions is None:
+        print("Listing Yale accessions in the archive...")
+        with metrics.phase("list"):
+            accessions = list(iter_accessions(url_filter=YALE_DOCUMENTS_FILTER))
+    unknown = sum(
+        1 for accession in accessions
+        if YALE_DOCUMENTS_FILTER in (accession.get('seed_url') or "") and not has_metadata(catalog.get(accession['seed_url']))
+    )
+    if unknown:
+        print(f"[!] {unknown} accession(s) have no title or date in the catalog, so only their subjects are checked.")
+        print("    Run `uv run catalog.py import-csv clean_yhlr_reports.csv` first to reconcile titles and dates too.")
+    plan = list(plan_reconciliation(accessions, catalog))
+    for accession, changes in plan:
+        print_diff(accession, changes)
+    print(f"\n{len(plan)} of {len(accessions)} accessions need updating.")
+
+    if dry_run or not plan:
+        return len(plan), 0
+    with metrics.phase("put"):
+        updated, failed = apply_reconciliation(plan, workers, rate)
+    print(f"Updated {updated}, failed {failed}.")
+    return updated, failed
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Fix the subject and metadata of Yale accessions already in the archive.",
+        epilog="Titles and dates are compared against the catalog, so only reports it has them for get those fixed; "
+               "fill it in with `catalog.py import-csv clean_yhlr_reports.csv` first.",
+    )
+    parser.add_argument("--urls", nargs="+", metavar="URL", help="Only reconcile the accessions for these URLs.")
+    parser.add_argument("--dry-run", action="store_true", help="Print the changes without sending any PUTs.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Maximum concurrent PUTs.")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Maximum PUTs per second.")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if not API_KEY:
+        print("Error: SDA_API_KEY not set.")
+        sys.exit(1)
+
+    with metrics.phase("lookup"):
+        accessions = find_accessions_for_urls(args.urls) if args.urls else None
+    _, failed = reconcile(load_catalog(), accessions, args.dry_run, args.workers, args.rate)
+    sys.exit(1 if failed else 0)
 
 if __name__ == "__main__":
-    main()
+    with metrics.run("update_existing_subjects"):
+        main()
@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+
+import get_latest_yale_reports as yale
+
+# Long-running companion to get_latest_yale_reports.py. Keeps one HTTP
+# session, the parsed report list and the archive index in memory, refreshes
+# them on a schedule and answers JSON requests (one per line) over a Unix
+# socket or stdin/stdout. get_latest_yale_reports.py asks it first when its
+# socket exists.
+#
+#   {"cmd": "latest"}                      same output as get_latest_yale_reports.py
+#   {"cmd": "new", "since_url": "..."}     same output as --new (since_url defaults to the manifest)
+#   {"cmd": "new", "known_urls": [...]}    same output as --known-urls
+#   {"cmd": "uncataloged"}                 same output as --uncataloged
+#   {"cmd": "refresh"}                     refetch now, then answer like "status"
+#   {"cmd": "status"}
+DEFAULT_REFRESH = 10 * 60 # seconds
+INDEX_MAX_AGE = 15 * 60 # seconds
+READY_TIMEOUT = 30 # seconds a request waits for the first refresh
+
+def log(message):
+    print(f"[WATCHER] {message}", file=sys.stderr, flush=True)
+
+class Watcher:
+    def __init__(self, refresh_interval=DEFAULT_REFRESH, use_index=True):
+        import requests
+
+        self.refresh_interval = refresh_interval
+        self.use_index = use_index
+        self.session = requests.Session()
+        self.blocks = []
+        self.headers = {}
+        self.checked_at = None
+        self.index = None
+        self.lock = threading.Lock()
+        self.ready = threading.Event() # set once the first refresh has been tried
+        self.stopping = threading.Event()
+
+    # --- refreshing --------------------------------------------------------
+
+    def refresh(self):
+        """
+        Refetches the page (conditionally, over the kept-alive session) and,
+        when due, the archive index. Returns True if the page changed.
+        """
+        conditional = {}
+        if self.headers.get("ETag"):
+            conditional["If-None-Match"] = self.headers["ETag"]
+        if self.headers.get("Last-Modified"):
+            conditional["If-Modified-Since"] = self.headers["Last-Modified"]
+
+        with self.session.get(yale.URL, headers=conditional, timeout=10, stream=True) as response:
+            changed = response.status_code != 304
+            if changed:
+                response.raise_for_status()
+                blocks = list(yale.iter_report_blocks(response))
+                headers = {key: response.headers.get(key) for key in ("ETag", "Last-Modified")}
+
+        with self.lock:
+            if changed:
+                self.blocks, self.headers = blocks, headers
+            self.checked_at = time.time()
+
+        if self.use_index:
+            self.refresh_index()
+        return changed
+
+    def refresh_index(self):
+        if self.index is not None and self.index.age() < INDEX_MAX_AGE:
+            return
+        sys.path.insert(0, str(yale.INGEST_DIR))
+        from archive_index import load_archive_index
+
+        try:
+            index = load_archive_index(max_age=INDEX_MAX_AGE)
+        except Exception as e:
+            log(f"Archive index refresh failed: {e}")
+            return
+        with self.lock:
+            self.index = index
+
+    def run_refresher(self):
+        while not self.stopping.is_set():
+            try:
+                changed = self.refresh()
+                log(f"Refreshed: {len(self.blocks)} reports{'' if changed else ' (unchanged)'}.")
+            except Exception as e:
+                log(f"Refresh failed: {e}")
+            self.ready.set()
+            self.stopping.wait(self.refresh_interval)
+
+    # --- answering ---------------------------------------------------------
+
+    def _changed(self, latest):
+        """
+        Same meaning as the one-shot script: has the latest report changed
+        since the previous check? Shares its cache file so both agree, but
+        only rewrites it when something in it changed.
+        """
+        cache = yale.load_cache()
+        changed = yale.block_hash(latest) != cache.get("section_hash")
+        yale.update_cache(self.headers, latest, cache)
+        return changed
+
+    def latest(self):
+        latest = self.blocks[0] if self.blocks else None
+        error = yale.latest_error(latest)
+        if error:
+            return {"error": error}
+        return {**yale.to_result(latest), "changed": self._changed(latest), "checked_at": self.checked_at}
+
+    def new(self, since_url=None, known_urls=None):
+        new_reports, anchor_found, latest = yale.select_new_reports(self.blocks, since_url, known_urls)
+        if self.index is not None:
+            for report in new_reports:
+                report["archived"] = report["url"] in self.index
+        output = {"changed": latest is not None and self._changed(latest), "reports": new_reports,
+                  "checked_at": self.checked_at}
+        if since_url:
+            output = {"since_url": since_url, "anchor_found": anchor_found, **output}
+        return output
+
+    def status(self):
+        return {
+            "checked_at": self.checked_at,
+            "reports": len(self.blocks),
+            "index_size": len(self.index) if self.index is not None else None,
+            "refresh_interval": self.refresh_interval,
+        }
+
+    def handle(self, request):
+        cmd = request.get("cmd", "latest")
+        self.ready.wait(READY_TIMEOUT)
+        if cmd == "refresh":
+            self.refresh()
+            return self.status()
+        with self.lock:
+            if self.checked_at is None:
+                return {"error": "Not ready: the first refresh has not succeeded."}
+            if cmd == "latest":
+                return self.latest()
+            if cmd == "new":
+                known_urls = request.get("known_urls")
+                if known_urls is None and "since_url" not in request:
+                    request["since_url"] = yale.load_manifest().get("last_ingested_url")
+                return self.new(request.get("since_url"), set(known_urls) if known_urls is not None else None)
+            if cmd == "uncataloged":
+                return self.new(known_urls=yale.load_cataloged_urls())
+            if cmd == "status":
+                return self.status()
+        return {"error": f"Unknown command: {cmd}"}
+
+    def answer(self, line):
+        try:
+            return self.handle(json.loads(line))
+        except Exception as e:
+            return {"error": str(e)}
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if line.strip():
+                self.wfile.write(json.dumps(self.server.watcher.answer(line)).encode('utf-8') + b"\n")
+
+def serve_socket(watcher, path=yale.WATCHER_SOCKET):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        if yale.ask_watcher({"cmd": "status"}) is not None:
+            log(f"Another watcher is already listening on {path}.")
+            sys.exit(1)
+        path.unlink()
+
+    with socketserver.ThreadingUnixStreamServer(str(path), RequestHandler) as server:
+        server.daemon_threads = True
+        server.watcher = watcher
+        os.chmod(path, 0o600)
+        log(f"Listening on {path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            path.unlink(missing_ok=True)
+
+def serve_stdio(watcher):
+    for line in sys.stdin:
+        if line.strip():
+            print(json.dumps(watcher.answer(line)), flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep the Yale reports list warm and answer queries about it.")
+    parser.add_argument("--stdio", action="store_true", help="Answer JSON lines on stdin instead of a socket.")
+    parser.add_argument("--refresh", type=float, default=DEFAULT_REFRESH, help="Seconds between page refreshes.")
+    parser.add_argument("--no-index", action="store_true", help="Don't keep the SDA archive index.")
+    args = parser.parse_args()
+
+    if os.environ.get("INGEST_HTTP"):
+        # Record or replay the watcher's requests like the ingest scripts'
+        if str(yale.INGEST_DIR) not in sys.path:
+            sys.path.insert(0, str(yale.INGEST_DIR))
+        import http_cassette
+
+        http_cassette.install_from_env()
+    watcher = Watcher(args.refresh, use_index=not args.no_index)
+    threading.Thread(target=watcher.run_refresher, daemon=True).start()
+    if args.stdio:
+        serve_stdio(watcher)
+    else:
+        serve_socket(watcher)
+    watcher.stopping.set()
+
+if __name__ == "__main__":
+    main()